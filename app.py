@@ -2,62 +2,315 @@
 Flask application for portfolio reconciliation system.
 """
 import os
+import shutil
 import logging
 import tempfile
-from datetime import datetime, date
+import threading
+import copy
+import weakref
 from decimal import Decimal
-from flask import Flask, request, jsonify
-from sqlalchemy import func
-from sqlalchemy.orm import Session
-
-from models import init_db, get_session, Account, Trade, Position
+from datetime import datetime, date
+from functools import lru_cache
+import orjson
+from flask import Flask, current_app, request, jsonify
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import secure_filename
+from sqlalchemy import Float, Integer, and_, bindparam, case, cast, func, literal, select, union_all
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
+
+from models import create_db_engine, init_db, get_session, Account, IngestVersion, Trade, Position
 from ingestion import ingest_file
 from config.logger_config import setup_logging
 
+
+class OrjsonProvider(DefaultJSONProvider):
+  """JSON provider backed by orjson; other types fall back to Flask's default()."""
+
+  # Formatting arguments orjson covers itself; json.dumps handles any others
+  _ORJSON_KWARGS = {"default", "sort_keys", "indent", "separators"}
+
+  def _option(self, sort_keys: bool, indent) -> int:
+    """orjson option flags matching json.dumps' sort_keys and indent=2."""
+    option = orjson.OPT_SORT_KEYS if sort_keys else 0
+    if indent:
+      option |= orjson.OPT_INDENT_2
+    return option
+
+  def dumps(self, obj, **kwargs):
+    kwargs.setdefault("default", self.default)
+    kwargs.setdefault("sort_keys", self.sort_keys)
+    if not kwargs.keys() <= self._ORJSON_KWARGS or kwargs.get("indent") not in (None, 2):
+      return super().dumps(obj, **kwargs)
+    option = self._option(kwargs["sort_keys"], kwargs.get("indent"))
+    return orjson.dumps(obj, default=kwargs["default"], option=option).decode()
+
+  def loads(self, s, **kwargs):
+    return orjson.loads(s)
+
+  def response(self, *args, **kwargs):
+    """Build the response straight from orjson's bytes, skipping a str round-trip."""
+    obj = self._prepare_response_obj(args, kwargs)
+    indent = (self.compact is None and self._app.debug) or self.compact is False
+    option = self._option(self.sort_keys, indent) | orjson.OPT_APPEND_NEWLINE
+    body = orjson.dumps(obj, default=self.default, option=option)
+    return self._app.response_class(body, mimetype=self.mimetype)
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+# Upload limits and spool location for ingested files
+app.config["MAX_CONTENT_LENGTH"] = int(os.environ.get("MAX_UPLOAD_BYTES", 512 * 1024 * 1024))
+app.config["UPLOAD_FOLDER"] = os.environ.get("UPLOAD_FOLDER", tempfile.gettempdir())
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Uploads may arrive concurrently; apply them to the database one at a time
+INGEST_LOCK = threading.Lock()
 
-# Initialize logging
-setup_logging()
 logger = logging.getLogger(__name__)
 
 # Database setup
 DB_URL = os.environ.get("DATABASE_URL", "sqlite:///portfolio.db")
 
-# Wipe database on startup for clean demos
-if DB_URL.startswith("sqlite:///"):
-  db_path = DB_URL.replace("sqlite:///", "")
-  if os.path.exists(db_path):
-    os.remove(db_path)
-    logger.info(f"Removed existing database: {db_path}")
+# Workers only connect; the schema is created by bootstrap()
+engine = create_db_engine(DB_URL)
+
+# One session per request thread, released in teardown_appcontext
+SessionLocal = scoped_session(sessionmaker(expire_on_commit=False))
+
+
+# Cost of a single trade: price * |quantity| when priced, else |market_value|
+TRADE_COST = case(
+  (Trade.price.isnot(None), Trade.price * func.abs(Trade.quantity)),
+  else_=func.abs(Trade.market_value),
+)
+
+# Signed value of a single trade: price * quantity when priced, else market_value
+TRADE_VALUE = case(
+  (Trade.price.isnot(None), Trade.price * Trade.quantity),
+  else_=Trade.market_value,
+)
+
+
+def per_share(total: float, shares: int) -> float:
+  """Average a whole-cent total over shares in decimal, free of float division noise."""
+  return float(Decimal(repr(total)) / shares)
+
+
+def money_sum(expr):
+  """SUM of a money expression rounded back to the columns' 2-place scale."""
+  return func.round(func.sum(expr), 2)
+
 
-# Initialize fresh database
-engine = init_db(DB_URL)
-logger.info(f"Initialized fresh database at: {DB_URL}")
+def cents(expr):
+  """A 2-place money expression as whole integer cents, for exact comparisons."""
+  return cast(func.round(expr * 100), Integer)
+
+
+def concentration_fields(market_value: float, total_value: float, threshold: Decimal) -> dict:
+  """Concentration and excess percentages of a holding, computed in decimal."""
+  concentration = Decimal(repr(market_value)) / Decimal(repr(total_value))
+  return {
+    "concentration_pct": float(concentration * 100),
+    "threshold_pct": float(threshold * 100),
+    "excess_pct": float((concentration - threshold) * 100),
+  }
+
+
+@lru_cache(maxsize=32)
+def net_shares_stmt(group_by: tuple = ("account_id", "ticker")):
+  """Net traded shares per group_by columns up to the :as_of date, built once per grouping."""
+  keys = [getattr(Trade, name) for name in group_by]
+  return (
+    select(*keys, func.sum(Trade.quantity).label("shares"))
+    .where(Trade.trade_date <= bindparam("as_of"))
+    .group_by(*keys)
+  )
+
+
+def _parse_ymd(value: str) -> date:
+  """Parse YYYY-MM-DD like strptime, slicing digits when the layout is exact."""
+  if len(value) == 10 and value[4] == value[7] == "-":
+    digits = value[0:4] + value[5:7] + value[8:10]
+    if digits.isascii() and digits.isdigit():
+      return date(int(value[0:4]), int(value[5:7]), int(value[8:10]))
+  return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+# File formats implied by extension alone; .csv also needs a format hint in the name
+_EXT_FORMATS = {
+  ".txt": "PIPE_FORMAT2",
+  ".yaml": "YAML_POSITIONS",
+  ".yml": "YAML_POSITIONS",
+}
+
+
+def infer_file_format(filename: str):
+  """Infer an ingest file format from an upload's filename, or None."""
+  name = filename.lower()
+  ext = os.path.splitext(name)[1]
+  if ext == ".csv":
+    if "format1" in name:
+      return "CSV_FORMAT1"
+    if "format2" in name:
+      return "PIPE_FORMAT2"
+    return None
+  return _EXT_FORMATS.get(ext)
+
+
+def get_engine():
+  """Engine for the current app: app.config["ENGINE"] if set, else the module engine."""
+  app_engine = current_app.config.get("ENGINE")
+  return engine if app_engine is None else app_engine
 
 
 def get_db_session() -> Session:
-  """Get database session for request."""
-  return get_session(engine)
+  """Get the scoped database session for the current request."""
+  if not SessionLocal.registry.has():
+    # Bind on first use so a swapped engine is honoured
+    return SessionLocal(bind=get_engine())
+  return SessionLocal()
+
+
+def bootstrap():
+  """
+  Wipe and recreate the database for a clean demo run.
+
+  Runs only under `python app.py` or `flask --app app init-db`, never on
+  import, so server and process pool workers never race to delete the file.
+  """
+  global engine
+  engine.dispose()
+
+  if DB_URL.startswith("sqlite:///"):
+    db_path = DB_URL.replace("sqlite:///", "")
+    if os.path.exists(db_path):
+      os.remove(db_path)
+      logger.info(f"Removed existing database: {db_path}")
+    # Stale WAL sidecar files must not outlive the database they belong to
+    for suffix in ("-wal", "-shm"):
+      if os.path.exists(db_path + suffix):
+        os.remove(db_path + suffix)
+
+  engine = init_db(DB_URL)
+  _engine_caches.clear()
+  logger.info(f"Initialized fresh database at: {DB_URL}")
+
+
+def create_app() -> Flask:
+  """
+  Set up logging and return the app; the entry point for servers, e.g.
+  `flask --app "app:create_app()" run`. Importing this module stays free of
+  side effects, so ingestion's pool workers can re-import it safely.
+  """
+  setup_logging()
+  return app
+
+
+@app.cli.command("init-db")
+def init_db_command():
+  """Wipe and recreate the database."""
+  bootstrap()
+
+
+@app.teardown_appcontext
+def remove_db_session(exception=None):
+  """Return the request's session (and its connection) to the pool."""
+  SessionLocal.remove()
+
+
+INGEST_VERSION_QUERY = select(IngestVersion.version).where(IngestVersion.id == 1)
+
+
+def ingest_version(db_engine) -> int:
+  """
+  The database's ingest counter, used as the cache key for reports.
+
+  Costs one primary-key SELECT per report request; that is what lets every
+  worker process see a commit made by any other without sharing memory.
+  """
+  with db_engine.connect() as connection:
+    return connection.scalar(INGEST_VERSION_QUERY)
+
+
+# Memoised builders per engine; weak keys let disposed and test engines be freed
+_engine_caches = weakref.WeakKeyDictionary()
+
+
+def engine_cache(db_engine, build, maxsize: int):
+  """
+  An lru_cache'd build(session, *args) for one engine, created on first use.
+  Entries are keyed on args alone and hold only a weak reference to the engine.
+  """
+  caches = _engine_caches.setdefault(db_engine, {})
+  cached = caches.get(build)
+  if cached is None:
+    engine_ref = weakref.ref(db_engine)
+
+    @lru_cache(maxsize=maxsize)
+    def cached(*args):
+      session = get_session(engine_ref())
+      try:
+        return build(session, *args)
+      finally:
+        session.close()
+
+    caches[build] = cached
+  return cached
+
+
+def _build_report(session: Session, builder, query_date: date, version: int) -> dict:
+  """Build a date-keyed report; version only distinguishes cache entries."""
+  return builder(session, query_date)
+
+
+def cached_report(builder, db_engine, query_date: date, version: int) -> dict:
+  """
+  Serve a date-keyed report from memory, building it on first use.
+
+  Reports only change when new data is ingested; callers pass
+  ingest_version() so a commit from any worker retires older entries.
+  Each caller gets its own copy to modify.
+  """
+  report = engine_cache(db_engine, _build_report, 64)(builder, query_date, version)
+  return copy.deepcopy(report)
+
+
+def _build_account_positions(session: Session, account_id: str, query_date: date, version: int):
+  """Build one account's positions payload and HTTP status; version only distinguishes cache entries."""
+  return build_account_positions(session, account_id, query_date)
+
+
+def cached_account_positions(db_engine, account_id: str, query_date: date, version: int):
+  """
+  Positions payload and HTTP status for one account on a date, memoised
+  like cached_report so repeated lookups skip the position and cost queries.
+  """
+  cached = engine_cache(db_engine, _build_account_positions, 256)
+  payload, status = cached(account_id, query_date, version)
+  return copy.deepcopy(payload), status
 
 
 @app.before_request
 def log_request():
   """Log incoming request details."""
-  logger.info(
-    f"REQUEST: {request.method} {request.path} | "
-    f"Args: {dict(request.args)} | "
-    f"Remote: {request.remote_addr}"
-  )
+  if logger.isEnabledFor(logging.INFO):
+    logger.info(
+      "REQUEST: %s %s | Args: %s | Remote: %s",
+      request.method, request.path, request.args, request.remote_addr,
+    )
 
 
 @app.after_request
 def log_response(response):
   """Log response details."""
-  logger.info(
-    f"RESPONSE: {request.method} {request.path} | "
-    f"Status: {response.status_code} | "
-    f"Size: {response.content_length or 0} bytes"
-  )
+  if logger.isEnabledFor(logging.INFO):
+    logger.info(
+      "RESPONSE: %s %s | Status: %s | Size: %s bytes",
+      request.method, request.path, response.status_code,
+      response.content_length or 0,
+    )
   return response
 
 
@@ -97,15 +350,8 @@ def ingest():
     file_format = request.form.get('file_format')
 
     if not file_format:
-      # Infer format from filename
-      filename = uploaded_file.filename.lower()
-      if filename.endswith('.csv') and 'format1' in filename:
-        file_format = 'CSV_FORMAT1'
-      elif filename.endswith('.txt') or ('format2' in filename and filename.endswith('.csv')):
-        file_format = 'PIPE_FORMAT2'
-      elif filename.endswith('.yaml') or filename.endswith('.yml'):
-        file_format = 'YAML_POSITIONS'
-      else:
+      file_format = infer_file_format(uploaded_file.filename)
+      if not file_format:
         return jsonify({
           "error": "Could not infer file_format from filename. Please specify explicitly.",
           "hint": "Use file_format form field: CSV_FORMAT1, PIPE_FORMAT2, or YAML_POSITIONS"
@@ -113,17 +359,22 @@ def ingest():
 
     session = get_db_session()
     try:
-      # Save uploaded file to a temporary location
-      with tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix=os.path.splitext(uploaded_file.filename)[1]) as tmp_file:
-        uploaded_file.save(tmp_file.name)
-        tmp_path = tmp_file.name
+      # Stream the upload into a private scratch directory that is removed
+      # with everything in it when the block exits
+      with tempfile.TemporaryDirectory(dir=app.config["UPLOAD_FOLDER"]) as tmp_dir:
+        tmp_path = os.path.join(tmp_dir, secure_filename(uploaded_file.filename) or "upload")
+        with open(tmp_path, "wb") as tmp_file:
+          shutil.copyfileobj(uploaded_file.stream, tmp_file, UPLOAD_CHUNK_SIZE)
 
-      try:
         # Process the file
-        report = ingest_file(session, tmp_path, file_format)
+        # Committed data bumps the database's ingest version, retiring cached reports
+        with INGEST_LOCK:
+          report = ingest_file(session, tmp_path, file_format)
 
         # Override file_name with original uploaded filename
         report.file_name = uploaded_file.filename
+        # The report is final here, so read its derived properties once
+        has_errors = report.has_errors
 
         response_data = {
           "file_name": report.file_name,
@@ -136,20 +387,20 @@ def ingest():
           "custodians_detected": report.custodians_detected,
           "errors": report.errors,
           "warnings": report.warnings,
-          "status": "success" if not report.has_errors else "partial_success",
+          "status": "success" if not has_errors else "partial_success",
         }
 
         logger.info(f"Ingestion completed: {report.file_name} - {report.records_valid} records")
-        return jsonify(response_data), 200 if not report.has_errors else 207
-
-      finally:
-        # Clean up temp file
-        if os.path.exists(tmp_path):
-          os.unlink(tmp_path)
+        return jsonify(response_data), 200 if not has_errors else 207
 
     finally:
       session.close()
 
+  except RequestEntityTooLarge:
+    limit = app.config["MAX_CONTENT_LENGTH"]
+    logger.warning(f"Rejected upload larger than {limit} bytes")
+    return jsonify({"error": f"Upload exceeds maximum size of {limit} bytes"}), 413
+
   except Exception as e:
     logger.error(f"Ingestion failed: {str(e)}", exc_info=True)
     return jsonify({"error": str(e)}), 500
@@ -161,148 +412,161 @@ def get_positions():
   Get positions for an account on a specific date.
 
   Query params:
-  - account: Account ID (required)
+  - account: Account ID (required unless accounts is given)
+  - accounts: Comma-separated account IDs, answered in one batched response
   - date: Date in YYYY-MM-DD format (required)
   """
   try:
     account_id = request.args.get("account")
+    account_ids = [a for a in request.args.get("accounts", "").split(",") if a]
     date_str = request.args.get("date")
 
-    if not account_id or not date_str:
+    if not (account_id or account_ids) or not date_str:
       return jsonify(
         {"error": "Both 'account' and 'date' parameters are required"}
       ), 400
 
     try:
-      query_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+      query_date = _parse_ymd(date_str)
     except ValueError:
       return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
 
-    session = get_db_session()
-    try:
-      # Get positions from bank file
-      positions = (
-        session.query(Position)
-        .filter(
-          Position.account_id == account_id,
-          Position.report_date == query_date
-        )
-        .all()
-      )
-
-      if not positions:
-        # Try to calculate from trades if no position data
-        logger.warning(
-          f"No position data found for {account_id} on {query_date}. "
-          f"Attempting to calculate from trades."
-        )
-        return calculate_positions_from_trades(session, account_id, query_date)
-
-      # Calculate cost basis from trades
-      result = []
-      for pos in positions:
-        # Get trades for this ticker up to this date
-        trades = (
-          session.query(Trade)
-          .filter(
-            Trade.account_id == account_id,
-            Trade.ticker == pos.ticker,
-            Trade.trade_date <= query_date
-          )
-          .order_by(Trade.trade_date)
-          .all()
-        )
-
-        total_cost = Decimal(0)
-        total_shares = 0
-
-        for trade in trades:
-          if trade.price:
-            # Use actual price from trade
-            total_cost += trade.price * abs(trade.quantity)
-          elif trade.market_value:
-            # Use market value from trade
-            total_cost += abs(trade.market_value)
-
-          total_shares += trade.quantity
-
-        # Calculate average cost basis
-        cost_basis = total_cost / total_shares if total_shares != 0 else Decimal(0)
-
-        result.append({
-          "ticker": pos.ticker,
-          "shares": pos.shares,
-          "market_value": float(pos.market_value),
-          "cost_basis": float(cost_basis),
-          "total_cost": float(total_cost),
-          "unrealized_pnl": float(pos.market_value - total_cost),
-          "custodian_ref": pos.custodian_ref,
-        })
-
-      response = {
-        "account_id": account_id,
-        "date": date_str,
-        "positions": result,
-        "total_market_value": float(sum(p.market_value for p in positions)),
-      }
-
-      logger.info(f"Positions retrieved for {account_id} on {date_str}: {len(result)} positions")
-      return jsonify(response), 200
-
-    finally:
-      session.close()
+    db_engine = get_engine()
+    version = ingest_version(db_engine)
+    if account_ids:
+      # Batched lookup: one response, positions tagged with their account
+      positions = []
+      for acc in account_ids:
+        payload, status = cached_account_positions(db_engine, acc, query_date, version)
+        if status == 200:
+          positions.extend({"account_id": acc, **pos} for pos in payload["positions"])
+      logger.info(f"Positions retrieved for {len(account_ids)} accounts on {date_str}: {len(positions)} positions")
+      return jsonify({"accounts": account_ids, "date": date_str, "positions": positions}), 200
+
+    payload, status = cached_account_positions(db_engine, account_id, query_date, version)
+    return jsonify(payload), status
 
   except Exception as e:
     logger.error(f"Failed to retrieve positions: {str(e)}", exc_info=True)
     return jsonify({"error": str(e)}), 500
 
 
+def build_account_positions(session: Session, account_id: str, query_date: date):
+  """Positions payload and HTTP status for one account on a date."""
+  date_str = query_date.strftime("%Y-%m-%d")
+
+  # Get positions from bank file
+  positions = (
+    session.query(Position)
+    .filter(
+      Position.account_id == account_id,
+      Position.report_date == query_date
+    )
+    .all()
+  )
+
+  if not positions:
+    # Try to calculate from trades if no position data
+    logger.warning(
+      f"No position data found for {account_id} on {query_date}. "
+      f"Attempting to calculate from trades."
+    )
+    return calculate_positions_from_trades(session, account_id, query_date)
+
+  # Aggregate cost and share totals per held ticker in the database
+  tickers = {pos.ticker for pos in positions}
+  cost_rows = (
+    session.query(
+      Trade.ticker,
+      cast(money_sum(TRADE_COST), Float).label("total_cost"),
+      func.sum(Trade.quantity).label("shares"),
+    )
+    .filter(
+      Trade.account_id == account_id,
+      Trade.trade_date <= query_date,
+      Trade.ticker.in_(tickers)
+    )
+    .group_by(Trade.ticker)
+    .all()
+  )
+  costs_by_ticker = {row.ticker: row for row in cost_rows}
+
+  # Calculate cost basis from trades
+  result = []
+  total_mv = 0.0
+  for pos in positions:
+    # SQLite hands whole-dollar NUMERIC values back as int
+    market_value = float(pos.market_value)
+    total_mv += market_value
+    total_cost = 0.0
+    total_shares = 0
+    row = costs_by_ticker.get(pos.ticker)
+    if row:
+      total_cost = row.total_cost or 0.0
+      total_shares = row.shares
+
+    # Calculate average cost basis
+    cost_basis = per_share(total_cost, total_shares) if total_shares != 0 else 0.0
+
+    result.append({
+      "ticker": pos.ticker,
+      "shares": pos.shares,
+      "market_value": market_value,
+      "cost_basis": cost_basis,
+      "total_cost": total_cost,
+      # Both sides are whole cents; rounding drops the float subtraction noise
+      "unrealized_pnl": round(market_value - total_cost, 2),
+      "custodian_ref": pos.custodian_ref,
+    })
+
+  response = {
+    "account_id": account_id,
+    "date": date_str,
+    "positions": result,
+    "total_market_value": round(total_mv, 2),
+  }
+
+  logger.info(f"Positions retrieved for {account_id} on {date_str}: {len(result)} positions")
+  return response, 200
+
+
 def calculate_positions_from_trades(session: Session, account_id: str, query_date: date):
   """Calculate positions from trade history when position data not available."""
-  trades = (
-    session.query(Trade)
+  cost_rows = (
+    session.query(
+      Trade.ticker,
+      cast(money_sum(TRADE_COST), Float).label("total_cost"),
+      func.sum(Trade.quantity).label("shares"),
+    )
     .filter(
       Trade.account_id == account_id,
       Trade.trade_date <= query_date
     )
+    .group_by(Trade.ticker)
+    .order_by(Trade.ticker)
     .all()
   )
 
-  if not trades:
-    return jsonify({
+  if not cost_rows:
+    return {
       "account_id": account_id,
       "date": query_date.strftime("%Y-%m-%d"),
       "positions": [],
       "total_market_value": 0.0,
       "note": "No trade or position data found"
-    }), 404
-
-  # Aggregate by ticker
-  positions_map = {}
-  for trade in trades:
-    if trade.ticker not in positions_map:
-      positions_map[trade.ticker] = {
-        "shares": 0,
-        "total_cost": Decimal(0),
-      }
-
-    positions_map[trade.ticker]["shares"] += trade.quantity
-
-    if trade.price:
-      positions_map[trade.ticker]["total_cost"] += trade.price * abs(trade.quantity)
-    elif trade.market_value:
-      positions_map[trade.ticker]["total_cost"] += abs(trade.market_value)
+    }, 404
 
   # Build result (note: no current market value available)
   result = []
-  for ticker, data in positions_map.items():
-    if data["shares"] != 0: # Only include non-zero positions
-      cost_basis = data["total_cost"] / data["shares"] if data["shares"] != 0 else Decimal(0)
+  for row in cost_rows:
+    total_cost = row.total_cost or 0.0
+    if row.shares != 0: # Only include non-zero positions
+      cost_basis = per_share(total_cost, row.shares)
       result.append({
-        "ticker": ticker,
-        "shares": data["shares"],
-        "cost_basis": float(cost_basis),
-        "total_cost": float(data["total_cost"]),
+        "ticker": row.ticker,
+        "shares": row.shares,
+        "cost_basis": cost_basis,
+        "total_cost": total_cost,
         "market_value": None,
         "note": "Calculated from trades; no current market value"
       })
@@ -314,7 +578,111 @@ def calculate_positions_from_trades(session: Session, account_id: str, query_dat
     "note": "Calculated from trade history; no position file data available"
   }
 
-  return jsonify(response), 200
+  return response, 200
+
+
+def find_concentration_violations(session: Session, holdings, threshold: Decimal):
+  """
+  Find holdings worth more than `threshold` of their account's positive value.
+
+  `holdings` is a subquery with account_id, ticker, shares and market_value
+  columns. Short positions are excluded from both the total and the check.
+  Rows carry the holding's columns plus the account's total_value.
+  """
+  numerator, denominator = threshold.as_integer_ratio()
+
+  # One pass over the holdings: a window sum gives each row its account total
+  positive = (
+    select(
+      holdings,
+      func.round(
+        func.sum(holdings.c.market_value).over(partition_by=holdings.c.account_id), 2
+      ).label("total_value"),
+    )
+    .where(holdings.c.market_value > 0)
+    .subquery()
+  )
+
+  return (
+    session.query(positive)
+    .filter(
+      # Cross-multiply whole cents by the threshold's exact ratio so a holding
+      # at exactly the threshold is never flagged; total_value is positive
+      cents(positive.c.market_value) * denominator > cents(positive.c.total_value) * numerator,
+    )
+    .order_by(positive.c.account_id, positive.c.ticker)
+    .all()
+  )
+
+
+def build_concentration_report(session: Session, query_date: date) -> dict:
+  """Concentration violations from trade history and bank positions on a date."""
+  threshold = Decimal("0.20") # 20%
+
+  # ===== CALCULATE FROM TRADES =====
+  # Net position per (account, ticker), aggregated in the database
+  trade_holdings = (
+    session.query(
+      Trade.account_id.label("account_id"),
+      Trade.ticker.label("ticker"),
+      func.sum(Trade.quantity).label("shares"),
+      cast(func.coalesce(money_sum(TRADE_VALUE), 0), Float).label("market_value"),
+    )
+    .filter(Trade.trade_date <= query_date)
+    .group_by(Trade.account_id, Trade.ticker)
+    .having(func.sum(Trade.quantity) != 0)
+    .subquery()
+  )
+
+  violations_from_trades = []
+  for row in find_concentration_violations(session, trade_holdings, threshold):
+    violations_from_trades.append({
+      "account_id": row.account_id,
+      "ticker": row.ticker,
+      "shares": row.shares,
+      "market_value": row.market_value,
+      "account_total_value": row.total_value,
+      **concentration_fields(row.market_value, row.total_value, threshold),
+    })
+
+  # ===== CALCULATE FROM BANK POSITIONS =====
+  bank_holdings = (
+    session.query(
+      Position.account_id.label("account_id"),
+      Position.ticker.label("ticker"),
+      Position.shares.label("shares"),
+      cast(Position.market_value, Float).label("market_value"),
+      Position.custodian_ref.label("custodian_ref"),
+    )
+    .filter(Position.report_date == query_date)
+    .subquery()
+  )
+
+  violations_from_bank = []
+  for row in find_concentration_violations(session, bank_holdings, threshold):
+    violations_from_bank.append({
+      "account_id": row.account_id,
+      "ticker": row.ticker,
+      "shares": row.shares,
+      "market_value": row.market_value,
+      "account_total_value": row.total_value,
+      **concentration_fields(row.market_value, row.total_value, threshold),
+      "custodian_ref": row.custodian_ref,
+    })
+
+  return {
+    "threshold_pct": 20.0,
+    "from_trades": {
+      "violations_found": len(violations_from_trades),
+      "violations": violations_from_trades,
+      "note": "Calculated from trade history"
+    },
+    "from_bank": {
+      "violations_found": len(violations_from_bank),
+      "violations": violations_from_bank,
+      "note": "From bank position file"
+    }
+  }
 
 
 @app.route("/compliance/concentration", methods=["GET"])
@@ -333,151 +701,96 @@ def compliance_concentration():
       return jsonify({"error": "'date' parameter is required"}), 400
 
     try:
-      query_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+      query_date = _parse_ymd(date_str)
     except ValueError:
       return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
 
-    session = get_db_session()
-    try:
-      threshold = Decimal("0.20") # 20%
-
-      # ===== CALCULATE FROM TRADES =====
-      trades = (
-        session.query(Trade)
-        .filter(Trade.trade_date <= query_date)
-        .all()
-      )
-
-      violations_from_trades = []
-      if trades:
-        # Group by (account, ticker) and calculate positions
-        positions_map = {}
-        for trade in trades:
-          key = (trade.account_id, trade.ticker)
-          if key not in positions_map:
-            positions_map[key] = {
-              'shares': 0,
-              'total_value': Decimal(0)
-            }
-
-          positions_map[key]['shares'] += trade.quantity
-
-          if trade.price:
-            positions_map[key]['total_value'] += trade.price * trade.quantity
-          elif trade.market_value:
-            positions_map[key]['total_value'] += trade.market_value
-
-        # Group by account and calculate totals
-        account_positions = {}
-        for (account_id, ticker), data in positions_map.items():
-          if data['shares'] == 0:
-            continue
-
-          if account_id not in account_positions:
-            account_positions[account_id] = []
-
-          account_positions[account_id].append({
-            'ticker': ticker,
-            'shares': data['shares'],
-            'market_value': data['total_value']
-          })
-
-        # Check violations
-        for account_id, positions_list in sorted(account_positions.items()):
-          # Only include POSITIVE positions in account total
-          # (Short positions/negative values excluded from concentration calculation)
-          total_value = sum(p['market_value'] for p in positions_list if p['market_value'] > 0)
-
-          for pos in sorted(positions_list, key=lambda x: x['ticker']):
-            # Only check concentration for positive positions
-            if pos['market_value'] <= 0:
-              continue
-
-            concentration = pos['market_value'] / total_value if total_value > 0 else Decimal(0)
-
-            if concentration > threshold:
-              violations_from_trades.append({
-                "account_id": account_id,
-                "ticker": pos['ticker'],
-                "shares": pos['shares'],
-                "market_value": float(pos['market_value']),
-                "account_total_value": float(total_value),
-                "concentration_pct": float(concentration * 100),
-                "threshold_pct": 20.0,
-                "excess_pct": float((concentration - threshold) * 100),
-              })
-
-      # ===== CALCULATE FROM BANK POSITIONS =====
-      bank_positions = (
-        session.query(Position)
-        .filter(Position.report_date == query_date)
-        .all()
-      )
-
-      violations_from_bank = []
-      if bank_positions:
-        # Group by account
-        account_positions_bank = {}
-        for pos in bank_positions:
-          if pos.account_id not in account_positions_bank:
-            account_positions_bank[pos.account_id] = []
-          account_positions_bank[pos.account_id].append(pos)
-
-        # Check violations
-        for account_id, positions_list in sorted(account_positions_bank.items()):
-          # Only include POSITIVE positions in account total
-          total_value = sum(p.market_value for p in positions_list if p.market_value > 0)
-
-          for pos in sorted(positions_list, key=lambda x: x.ticker):
-            # Only check concentration for positive positions
-            if pos.market_value <= 0:
-              continue
-
-            concentration = pos.market_value / total_value if total_value > 0 else Decimal(0)
-
-            if concentration > threshold:
-              violations_from_bank.append({
-                "account_id": account_id,
-                "ticker": pos.ticker,
-                "shares": pos.shares,
-                "market_value": float(pos.market_value),
-                "account_total_value": float(total_value),
-                "concentration_pct": float(concentration * 100),
-                "threshold_pct": 20.0,
-                "excess_pct": float((concentration - threshold) * 100),
-                "custodian_ref": pos.custodian_ref,
-              })
-
-      response = {
-        "date": date_str,
-        "threshold_pct": 20.0,
-        "from_trades": {
-          "violations_found": len(violations_from_trades),
-          "violations": violations_from_trades,
-          "note": "Calculated from trade history"
-        },
-        "from_bank": {
-          "violations_found": len(violations_from_bank),
-          "violations": violations_from_bank,
-          "note": "From bank position file"
-        }
-      }
-
-      logger.info(
-        f"Compliance check for {date_str}: "
-        f"{len(violations_from_trades)} violations from trades, "
-        f"{len(violations_from_bank)} violations from bank"
-      )
-      return jsonify(response), 200
+    db_engine = get_engine()
+    report = cached_report(build_concentration_report, db_engine, query_date, ingest_version(db_engine))
+    response = {"date": date_str, **report}
 
-    finally:
-      session.close()
+    logger.info(
+      f"Compliance check for {date_str}: "
+      f"{report['from_trades']['violations_found']} violations from trades, "
+      f"{report['from_bank']['violations_found']} violations from bank"
+    )
+    return jsonify(response), 200
 
   except Exception as e:
     logger.error(f"Compliance check failed: {str(e)}", exc_info=True)
     return jsonify({"error": str(e)}), 500
 
 
+def build_reconciliation_report(session: Session, query_date: date) -> dict:
+  """Discrepancies between trade-derived and bank-reported shares on a date."""
+  # Expected shares per (account, ticker) from trades up to this date
+  expected = net_shares_stmt().params(as_of=query_date).subquery()
+
+  # Actual shares from the bank file for this date
+  actual = (
+    session.query(Position.account_id, Position.ticker, Position.shares)
+    .filter(Position.report_date == query_date)
+    .subquery()
+  )
+
+  same_key = and_(
+    expected.c.account_id == actual.c.account_id,
+    expected.c.ticker == actual.c.ticker,
+  )
+
+  # SQLite lacks a portable FULL OUTER JOIN, so combine both LEFT JOIN
+  # directions and let the database return only mismatched keys
+  from_trades = (
+    select(
+      expected.c.account_id,
+      expected.c.ticker,
+      expected.c.shares.label("expected_shares"),
+      func.coalesce(actual.c.shares, 0).label("actual_shares"),
+    )
+    .select_from(expected.outerjoin(actual, same_key))
+    .where(expected.c.shares != func.coalesce(actual.c.shares, 0))
+  )
+  bank_only = (
+    select(
+      actual.c.account_id,
+      actual.c.ticker,
+      literal(0).label("expected_shares"),
+      actual.c.shares.label("actual_shares"),
+    )
+    .select_from(actual.outerjoin(expected, same_key))
+    .where(expected.c.account_id.is_(None), actual.c.shares != 0)
+  )
+  mismatches = union_all(from_trades, bank_only).subquery()
+
+  rows = (
+    session.query(mismatches)
+    .order_by(mismatches.c.account_id, mismatches.c.ticker)
+    .yield_per(1000)
+  )
+
+  discrepancies = []
+  for row in rows:
+    expected_shares = row.expected_shares
+    actual_shares = row.actual_shares
+    discrepancies.append({
+      "account_id": row.account_id,
+      "ticker": row.ticker,
+      "expected_shares": expected_shares,
+      "actual_shares": actual_shares,
+      "difference": actual_shares - expected_shares,
+      "status": "missing_in_bank" if actual_shares == 0 else
+           "missing_in_trades" if expected_shares == 0 else
+           "quantity_mismatch"
+    })
+
+  return {
+    "total_positions_in_bank": session.query(func.count()).select_from(actual).scalar(),
+    "total_positions_from_trades": session.query(func.count()).select_from(expected).scalar(),
+    "discrepancies_found": len(discrepancies),
+    "discrepancies": discrepancies,
+  }
+
+
 @app.route("/reconciliation", methods=["GET"])
 def reconciliation():
   """
@@ -493,78 +806,18 @@ def reconciliation():
       return jsonify({"error": "'date' parameter is required"}), 400
 
     try:
-      query_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+      query_date = _parse_ymd(date_str)
     except ValueError:
       return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
 
-    session = get_db_session()
-    try:
-      # Get positions from bank file
-      bank_positions = (
-        session.query(Position)
-        .filter(Position.report_date == query_date)
-        .all()
-      )
-
-      # Get trades up to this date and calculate expected positions
-      trades = (
-        session.query(Trade)
-        .filter(Trade.trade_date <= query_date)
-        .all()
-      )
-
-      # Calculate expected positions from trades
-      expected_positions = {}
-      for trade in trades:
-        key = (trade.account_id, trade.ticker)
-        if key not in expected_positions:
-          expected_positions[key] = 0
-        expected_positions[key] += trade.quantity
-
-      # Build map of bank positions
-      bank_positions_map = {}
-      for pos in bank_positions:
-        key = (pos.account_id, pos.ticker)
-        bank_positions_map[key] = pos.shares
-
-      # Find discrepancies
-      discrepancies = []
-
-      # Check all expected positions
-      all_keys = set(expected_positions.keys()) | set(bank_positions_map.keys())
-
-      for key in sorted(all_keys): # Sort by (account_id, ticker)
-        account_id, ticker = key
-        expected = expected_positions.get(key, 0)
-        actual = bank_positions_map.get(key, 0)
-
-        if expected != actual:
-          discrepancies.append({
-            "account_id": account_id,
-            "ticker": ticker,
-            "expected_shares": expected,
-            "actual_shares": actual,
-            "difference": actual - expected,
-            "status": "missing_in_bank" if actual == 0 else
-                 "missing_in_trades" if expected == 0 else
-                 "quantity_mismatch"
-          })
-
-      response = {
-        "date": date_str,
-        "total_positions_in_bank": len(bank_positions),
-        "total_positions_from_trades": len(expected_positions),
-        "discrepancies_found": len(discrepancies),
-        "discrepancies": discrepancies,
-      }
-
-      logger.info(
-        f"Reconciliation for {date_str}: {len(discrepancies)} discrepancies found"
-      )
-      return jsonify(response), 200
+    db_engine = get_engine()
+    report = cached_report(build_reconciliation_report, db_engine, query_date, ingest_version(db_engine))
+    response = {"date": date_str, **report}
 
-    finally:
-      session.close()
+    logger.info(
+      f"Reconciliation for {date_str}: {report['discrepancies_found']} discrepancies found"
+    )
+    return jsonify(response), 200
 
   except Exception as e:
     logger.error(f"Reconciliation failed: {str(e)}", exc_info=True)
@@ -572,4 +825,6 @@ def reconciliation():
 
 
 if __name__ == "__main__":
+  create_app()
+  bootstrap()
   app.run(debug=True, host="0.0.0.0", port=5000)
@@ -2,11 +2,36 @@
 Logging configuration with file rotation and configurable levels.
 """
 import os
+import atexit
 import logging
+import logging.handlers
+import queue
+import signal
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 
 
+# Longest a buffered INFO record waits before reaching the log file
+FLUSH_INTERVAL_SECONDS = 1.0
+
+
+def _flush_periodically(handler: logging.Handler):
+  """Flush a buffering handler on a timer, so a killed process loses at most a second of logs."""
+  def run():
+    while True:
+      time.sleep(FLUSH_INTERVAL_SECONDS)
+      handler.flush()
+
+  threading.Thread(target=run, name="log-flush", daemon=True).start()
+
+
+def _exit_on_sigterm(signum, frame):
+  """Turn SIGTERM into a normal exit so the atexit hooks flush buffered logs."""
+  raise SystemExit(128 + signum)
+
+
 def setup_logging(log_level: str = None):
   """
   Setup logging with file rotation and configurable levels.
@@ -42,18 +67,46 @@ def setup_logging(log_level: str = None):
     # Remove stale symlink
     current_log_file.unlink()
 
-  # Configure root logger
-  logging.basicConfig(
-    level=getattr(logging, log_level),
-    format="%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    handlers=[
-      # File handler for current log
-      logging.FileHandler(new_log_file, mode="w"),
-      # Console handler for stdout
-      logging.StreamHandler(),
-    ],
-  )
+  # Configure root logger. Records go through a queue so file and console
+  # writes happen on the listener thread instead of the request thread.
+  root = logging.getLogger()
+  if not root.handlers:
+    log_queue = queue.SimpleQueue()
+    formatter = logging.Formatter(
+      "%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
+      datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    # Rotating file handler for current log, buffered so INFO traffic is
+    # written in batches; errors flush immediately
+    file_handler = logging.handlers.RotatingFileHandler(
+      new_log_file, maxBytes=50_000_000, backupCount=5
+    )
+    file_handler.setFormatter(formatter)
+    buffered_handler = logging.handlers.MemoryHandler(
+      1000, flushLevel=logging.ERROR, target=file_handler
+    )
+    # Console handler for stdout
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    listener = logging.handlers.QueueListener(
+      log_queue, buffered_handler, stream_handler, respect_handler_level=True
+    )
+    listener.start()
+    # atexit runs last-registered first: drain the queue, then the buffer
+    atexit.register(buffered_handler.flush)
+    atexit.register(listener.stop)
+    # A timer bounds what a SIGKILL loses; SIGTERM, which `kill` sends and
+    # whose default action skips atexit, becomes a normal exit instead
+    _flush_periodically(buffered_handler)
+    if (
+      threading.current_thread() is threading.main_thread()
+      and signal.getsignal(signal.SIGTERM) == signal.SIG_DFL
+    ):
+      signal.signal(signal.SIGTERM, _exit_on_sigterm)
+
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+  root.setLevel(getattr(logging, log_level))
 
   # Create symlink to current log for easy access
   try:
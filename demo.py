@@ -1,26 +1,40 @@
 #!/usr/bin/env python3
 """
 Interactive TUI demo for portfolio reconciliation system.
-Uses Textual for a full-featured terminal user interface.
+Uses Textual for a full-featured terminal user interface (see demo_tui.py);
+--simple prints plain ASCII and never imports Textual.
 """
+import io
 import os
 import sys
+import json
+import uuid
+import atexit
 import argparse
 import requests
-from datetime import datetime
-from textual.app import App, ComposeResult
-from textual.containers import Container, Horizontal, Vertical, ScrollableContainer
-from textual.widgets import Header, Footer, Static, OptionList, Label
-from textual.widgets.option_list import Option
-from textual.binding import Binding
-from textual.screen import Screen
-from rich.text import Text
-from rich.table import Table
-from rich import box
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+try:
+  import orjson
+except ImportError: # The demo still runs on stdlib json without orjson
+  orjson = None
 
 # Base URL for API
 BASE_URL = "http://localhost:5000"
 
+# One keep-alive HTTP session shared by every API call
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+atexit.register(SESSION.close)
+
+
+def parse_json(response: requests.Response):
+  """Decode a response body, with orjson when it is available."""
+  if orjson is not None:
+    return orjson.loads(response.content)
+  return json.loads(response.content)
+
 # Global data storage
 APP_DATA = {
   "ingest_results": [],
@@ -29,571 +43,146 @@ APP_DATA = {
   "selected_account": "ACC001",
   "selected_date": "2026-01-15",
   "format": "1", # Default to format 1
+  "cache": {}, # Report payloads keyed by (report, date); cleared on ingest
 }
 
+def ingest_file_list(format_choice: str) -> list:
+  """Sample (file_path, file_format) pairs to ingest for a format selection."""
+  files = [("sample_data/bank_positions.yaml", "YAML_POSITIONS")]
 
-class IngestScreen(Screen):
-  """Screen showing file ingestion statistics and format comparison."""
-
-  BINDINGS = [
-    Binding("i", "app.switch_screen('ingest')", "Ingest", show=True),
-    Binding("c", "app.switch_screen('compliance')", "Compliance", show=True),
-    Binding("r", "app.switch_screen('reconciliation')", "Reconciliation", show=True),
-    Binding("q", "app.quit", "Quit", show=True),
-  ]
-
-  def compose(self) -> ComposeResult:
-    yield Header()
-    yield Container(
-      Static("[bold cyan]File Ingestion Summary[/bold cyan]", id="title"),
-      Static(id="ingest-stats"),
-      Static("\n[bold yellow]Format Equivalence Verification[/bold yellow]"),
-      Static(id="format-comparison"),
-      Static(id="note"),
-      id="main-content",
-    )
-    yield Footer()
-
-  def on_mount(self) -> None:
-    """Load and display ingestion data."""
-    self.update_display()
-
-  def update_display(self) -> None:
-    """Update the ingestion statistics display."""
-    if not APP_DATA["ingest_results"]:
-      self.query_one("#ingest-stats", Static).update(
-        "[dim]No data ingested yet. Ingesting files...[/dim]"
-      )
-      return
-
-    # Create ingestion summary table
-    table = Table(box=box.ROUNDED, show_header=True, header_style="bold magenta")
-    table.add_column("File", style="cyan")
-    table.add_column("Format", style="yellow")
-    table.add_column("Records", justify="right", style="green")
-    table.add_column("Valid", justify="right", style="green")
-    table.add_column("Failed", justify="right", style="red")
-    table.add_column("Success Rate", justify="right", style="blue")
-
-    for result in APP_DATA["ingest_results"]:
-      table.add_row(
-        result["file_name"],
-        result["file_format"],
-        str(result["records_processed"]),
-        str(result["records_valid"]),
-        str(result["records_failed"]),
-        result["success_rate"],
-      )
-
-    self.query_one("#ingest-stats", Static).update(table)
-
-    # Format comparison - find Format 1 and Format 2
-    format1 = None
-    format2 = None
-
-    for result in APP_DATA["ingest_results"]:
-      if result["file_format"] == "CSV_FORMAT1":
-        format1 = result
-      elif result["file_format"] == "PIPE_FORMAT2":
-        format2 = result
-
-    # Update note based on format selection
-    if APP_DATA["format"] == "both":
-      self.query_one("#note", Static).update(
-        "\n[dim italic]Note: Both trade formats ingested for comparison demonstration. "
-        "Reconciliation view de-duplicates on display (divides expected shares by 2).[/dim italic]"
-      )
-    elif APP_DATA["format"] == "1":
-      self.query_one("#note", Static).update(
-        "\n[dim italic]Note: CSV trade format (Format 1) ingested. "
-        "Use --format 2 or --format both to compare formats.[/dim italic]"
-      )
-    elif APP_DATA["format"] == "2":
-      self.query_one("#note", Static).update(
-        "\n[dim italic]Note: Pipe-delimited trade format (Format 2) ingested. "
-        "Use --format 1 or --format both to compare formats.[/dim italic]"
-      )
-
-    if format1 and format2:
-      comp_table = Table(box=box.SIMPLE, show_header=True, header_style="bold cyan")
-      comp_table.add_column("Metric", style="yellow")
-      comp_table.add_column("Format 1 (CSV)", justify="right", style="green")
-      comp_table.add_column("Format 2 (Pipe)", justify="right", style="blue")
-      comp_table.add_column("Match", justify="center")
-
-      match_records = format1["records_processed"] == format2["records_processed"]
-      match_success = format1["success_rate"] == format2["success_rate"]
-
-      comp_table.add_row(
-        "Records Processed",
-        str(format1["records_processed"]),
-        str(format2["records_processed"]),
-        "[green]✓[/green]" if match_records else "[red]✗[/red]",
-      )
-      comp_table.add_row(
-        "Success Rate",
-        format1["success_rate"],
-        format2["success_rate"],
-        "[green]✓[/green]" if match_success else "[red]✗[/red]",
-      )
-
-      self.query_one("#format-comparison", Static).update(comp_table)
-    else:
-      self.query_one("#format-comparison", Static).update(
-        "[dim]Waiting for both trade formats to be ingested...[/dim]"
-      )
-
-
-class ComplianceScreen(Screen):
-  """Screen showing compliance concentration violations."""
-
-  BINDINGS = [
-    Binding("i", "app.switch_screen('ingest')", "Ingest", show=True),
-    Binding("c", "app.switch_screen('compliance')", "Compliance", show=True),
-    Binding("r", "app.switch_screen('reconciliation')", "Reconciliation", show=True),
-    Binding("q", "app.quit", "Quit", show=True),
-  ]
-
-  def compose(self) -> ComposeResult:
-    yield Header()
-    yield Horizontal(
-      ScrollableContainer(Static(id="compliance-details"), id="main-view"),
-      Vertical(
-        Label("[bold]Account:[/bold]", classes="sidebar-label"),
-        OptionList(
-          Option("All Accounts", id="all"),
-          Option("ACC001", id="ACC001"),
-          Option("ACC002", id="ACC002"),
-          Option("ACC003", id="ACC003"),
-          Option("ACC004", id="ACC004"),
-          id="account-selector",
-        ),
-        Label(""),
-        Static(id="compliance-summary", classes="sidebar-summary"),
-        id="sidebar",
-      ),
-    )
-    yield Footer()
-
-  def on_mount(self) -> None:
-    """Load compliance data on mount."""
-    # Set initial selection
-    account_selector = self.query_one("#account-selector", OptionList)
-    account_selector.highlighted = 0 # All Accounts
-    self.refresh_data()
-
-  def on_option_list_option_selected(self, event: OptionList.OptionSelected) -> None:
-    """Handle account selection."""
-    if event.option.id == "all":
-      APP_DATA["selected_account"] = "all"
-    else:
-      APP_DATA["selected_account"] = event.option.id
-    self.refresh_data()
+  # Add trade files based on format selection
+  if format_choice == "1":
+    files.insert(0, ("sample_data/trades_format1.csv", "CSV_FORMAT1"))
+  elif format_choice == "2":
+    files.insert(0, ("sample_data/trades_format2.txt", "PIPE_FORMAT2"))
+  elif format_choice == "both":
+    files.insert(0, ("sample_data/trades_format1.csv", "CSV_FORMAT1"))
+    files.append(("sample_data/trades_format2.txt", "PIPE_FORMAT2"))
 
-  def refresh_data(self) -> None:
-    """Fetch and display compliance data."""
-    try:
-      response = requests.get(
-        f"{BASE_URL}/compliance/concentration",
-        params={"date": APP_DATA["selected_date"]},
-        timeout=5,
-      )
-      data = response.json()
-
-      # Get violations from both sources
-      from_trades = data.get("from_trades", {})
-      from_bank = data.get("from_bank", {})
-
-      trades_violations = from_trades.get("violations", [])
-      bank_violations = from_bank.get("violations", [])
-
-      # Filter by account if not 'all'
-      account_filter = APP_DATA["selected_account"].strip().lower()
-      if account_filter and account_filter != "all":
-        trades_violations = [v for v in trades_violations if v["account_id"].lower() == account_filter]
-        bank_violations = [v for v in bank_violations if v["account_id"].lower() == account_filter]
-
-      # Update sidebar summary
-      summary = (
-        f"[bold]Filter:[/bold]\n{APP_DATA['selected_account']}\n\n"
-        f"[bold]From Trades:[/bold]\n{len(trades_violations)}\n\n"
-        f"[bold]From Bank:[/bold]\n{len(bank_violations)}\n"
-      )
-      self.query_one("#compliance-summary", Static).update(summary)
-
-      # Build combined display
-      output = ""
-
-      # FROM TRADES section
-      output += "[bold cyan]FROM TRADE CALCULATIONS[/bold cyan]\n"
-      if len(trades_violations) > 0:
-        table = Table(
-          box=box.ROUNDED,
-          show_header=True,
-          header_style="bold cyan",
-        )
-        table.add_column("Account", style="cyan")
-        table.add_column("Ticker", style="yellow")
-        table.add_column("Shares", justify="right")
-        table.add_column("Market Value", justify="right")
-        table.add_column("Account Total", justify="right")
-        table.add_column("Concentration %", justify="right", style="red bold")
-        table.add_column("Excess %", justify="right", style="red")
-
-        for v in trades_violations:
-          table.add_row(
-            v["account_id"],
-            v["ticker"],
-            str(v["shares"]),
-            f"${v['market_value']:,.2f}",
-            f"${v['account_total_value']:,.2f}",
-            f"{v['concentration_pct']:.2f}%",
-            f"+{v['excess_pct']:.2f}%",
-          )
-      else:
-        table = "[dim]No violations[/dim]"
-
-      output_trades = table
-
-      # FROM BANK section
-      if len(bank_violations) > 0:
-        table2 = Table(
-          box=box.ROUNDED,
-          show_header=True,
-          header_style="bold magenta",
-        )
-        table2.add_column("Account", style="cyan")
-        table2.add_column("Ticker", style="yellow")
-        table2.add_column("Shares", justify="right")
-        table2.add_column("Market Value", justify="right")
-        table2.add_column("Account Total", justify="right")
-        table2.add_column("Concentration %", justify="right", style="red bold")
-        table2.add_column("Excess %", justify="right", style="red")
-
-        for v in bank_violations:
-          table2.add_row(
-            v["account_id"],
-            v["ticker"],
-            str(v["shares"]),
-            f"${v['market_value']:,.2f}",
-            f"${v['account_total_value']:,.2f}",
-            f"{v['concentration_pct']:.2f}%",
-            f"+{v['excess_pct']:.2f}%",
-          )
-      else:
-        table2 = "[dim]No violations (or no bank data)[/dim]"
-
-      # Combine both sections using Rich Text
-      from rich.console import Console, Group
-      from rich.panel import Panel
-
-      group = Group(
-        Panel(output_trades, title="[bold cyan]FROM TRADE CALCULATIONS[/bold cyan]", border_style="cyan"),
-        "",
-        Panel(table2, title="[bold magenta]FROM BANK POSITIONS[/bold magenta]", border_style="magenta"),
-      )
-
-      self.query_one("#compliance-details", Static).update(group)
+  return files
 
-    except Exception as e:
-      self.query_one("#compliance-details", Static).update(
-        f"[bold red]Error: {e}[/bold red]"
-      )
-
-
-class ReconciliationScreen(Screen):
-  """Screen showing trade vs bank position reconciliation."""
-
-  BINDINGS = [
-    Binding("i", "app.switch_screen('ingest')", "Ingest", show=True),
-    Binding("c", "app.switch_screen('compliance')", "Compliance", show=True),
-    Binding("r", "app.switch_screen('reconciliation')", "Reconciliation", show=True),
-    Binding("q", "app.quit", "Quit", show=True),
-  ]
-
-  def compose(self) -> ComposeResult:
-    yield Header()
-    yield Horizontal(
-      ScrollableContainer(Static(id="recon-details"), id="main-view"),
-      Vertical(
-        Label("[bold]Account:[/bold]", classes="sidebar-label"),
-        OptionList(
-          Option("All Accounts", id="all"),
-          Option("ACC001", id="ACC001"),
-          Option("ACC002", id="ACC002"),
-          Option("ACC003", id="ACC003"),
-          Option("ACC004", id="ACC004"),
-          id="account-selector",
-        ),
-        Label(""),
-        Static(id="recon-summary", classes="sidebar-summary"),
-        id="sidebar",
-      ),
+
+class MultipartUpload:
+  """
+  Streaming multipart/form-data body for one file plus plain form fields.
+
+  requests reads it in blocks as it sends, so the file is never held in
+  memory; the known length keeps Content-Length instead of chunked encoding.
+  """
+
+  def __init__(self, file_path: str, fields: dict, file_field: str = "file"):
+    boundary = uuid.uuid4().hex
+    self.content_type = f"multipart/form-data; boundary={boundary}"
+    head = "".join(
+      f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+      for name, value in fields.items()
+    )
+    head += (
+      f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; '
+      f'filename="{os.path.basename(file_path)}"\r\n'
+      "Content-Type: application/octet-stream\r\n\r\n"
+    )
+    head = head.encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+
+    self._file = open(file_path, "rb")
+    self._parts = [io.BytesIO(head), self._file, io.BytesIO(tail)]
+    self._length = len(head) + os.path.getsize(file_path) + len(tail)
+
+  def __len__(self) -> int:
+    return self._length
+
+  def read(self, size: int = -1) -> bytes:
+    """Read up to `size` bytes across the header, file and trailer parts."""
+    out = b""
+    while self._parts and (size < 0 or len(out) < size):
+      data = self._parts[0].read(-1 if size < 0 else size - len(out))
+      if not data:
+        self._parts.pop(0)
+      out += data
+    return out
+
+  def close(self) -> None:
+    self._file.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+
+
+def post_ingest(file_path: str, file_format: str) -> requests.Response:
+  """Upload a single file to the /ingest endpoint, streaming it from disk."""
+  with MultipartUpload(file_path, {"file_format": file_format}) as body:
+    return SESSION.post(
+      f"{BASE_URL}/ingest",
+      data=body,
+      headers={"Content-Type": body.content_type},
+      timeout=10,
     )
-    yield Footer()
-
-  def on_mount(self) -> None:
-    """Load reconciliation data on mount."""
-    # Set initial selection
-    account_selector = self.query_one("#account-selector", OptionList)
-    account_selector.highlighted = 1 # ACC001
-    self.refresh_data()
-
-  def on_option_list_option_selected(self, event: OptionList.OptionSelected) -> None:
-    """Handle account selection."""
-    if event.option.id == "all":
-      APP_DATA["selected_account"] = "all"
-    else:
-      APP_DATA["selected_account"] = event.option.id
-    self.refresh_data()
 
-  def refresh_data(self) -> None:
-    """Fetch and display reconciliation data."""
-    try:
-      response = requests.get(
-        f"{BASE_URL}/reconciliation",
-        params={"date": APP_DATA["selected_date"]},
-        timeout=5,
-      )
-      data = response.json()
-
-      # DE-DUPLICATE: Divide expected shares by 2 if both formats were ingested
-      # This keeps the server behavior correct while cleaning up the display
-      if APP_DATA["format"] == "both":
-        for disc in data["discrepancies"]:
-          disc["expected_shares"] = disc["expected_shares"] // 2
-          disc["difference"] = disc["actual_shares"] - disc["expected_shares"]
-
-      # Filter by account if not 'all'
-      account_filter = APP_DATA["selected_account"].strip().lower()
-      discrepancies = data["discrepancies"]
-
-      if account_filter and account_filter != "all":
-        discrepancies = [
-          d for d in discrepancies
-          if d["account_id"].lower() == account_filter
-        ]
-
-      # Update sidebar summary
-      summary = (
-        f"[bold]Filter:[/bold]\n{APP_DATA['selected_account']}\n\n"
-        f"[bold]Date:[/bold]\n{data['date']}\n\n"
-        f"[bold]Discrepancies:[/bold]\n{len(discrepancies)}\n"
-      )
-      self.query_one("#recon-summary", Static).update(summary)
-
-      # Discrepancies table
-      if len(discrepancies) > 0:
-        table = Table(
-          box=box.DOUBLE,
-          show_header=True,
-          header_style="bold yellow",
-          title=f"RECONCILIATION DISCREPANCIES ({APP_DATA['selected_account']})",
-        )
-        table.add_column("Account", style="cyan")
-        table.add_column("Ticker", style="yellow")
-        table.add_column("Expected\n(Trades)", justify="right", style="green")
-        table.add_column("Actual\n(Bank)", justify="right", style="blue")
-        table.add_column("Difference", justify="right")
-        table.add_column("Status", style="bold")
-
-        for disc in discrepancies:
-          diff = disc["difference"]
-          diff_style = "red bold" if diff != 0 else "green"
-          status = disc["status"].replace("_", " ").title()
-          status_style = "red" if "mismatch" in disc["status"] or "missing" in disc["status"] else "yellow"
-
-          table.add_row(
-            disc["account_id"],
-            disc["ticker"],
-            str(disc["expected_shares"]),
-            str(disc["actual_shares"]),
-            f"[{diff_style}]{diff:+d}[/{diff_style}]",
-            f"[{status_style}]{status}[/{status_style}]",
-          )
-
-        self.query_one("#recon-details", Static).update(table)
-      else:
-        self.query_one("#recon-details", Static).update(
-          f"\n\n[bold green]✓ All positions reconciled for {APP_DATA['selected_account']}[/bold green]"
-        )
 
-    except Exception as e:
-      self.query_one("#recon-details", Static).update(
-        f"[bold red]Error: {e}[/bold red]"
-      )
-
-
-class PortfolioReconApp(App):
-  """Interactive TUI for Portfolio Reconciliation System."""
-
-  CSS = """
-  #main-content {
-    padding: 1 2;
-  }
-
-  #title {
-    text-align: center;
-    padding: 1 0;
-    height: 3;
-  }
-
-  #main-view {
-    width: 3fr;
-    height: 100%;
-    border: solid $accent;
-    padding: 1;
-  }
-
-  #sidebar {
-    width: 1fr;
-    height: 100%;
-    border: solid $primary;
-    padding: 1;
-  }
-
-  .sidebar-label {
-    margin-bottom: 1;
-    text-style: bold;
-  }
-
-  .sidebar-value {
-    margin-bottom: 1;
-    color: $accent;
-  }
-
-  .sidebar-summary {
-    margin-top: 2;
-    padding: 1;
-    border: solid $secondary;
-  }
-
-  #account-selector {
-    height: auto;
-    max-height: 10;
-    margin-bottom: 1;
-  }
-
-  #date-display {
-    padding: 1;
-    background: $surface;
-    margin-bottom: 1;
-  }
-
-  OptionList {
-    border: solid $primary;
-  }
-
-  OptionList > .option-list--option-highlighted {
-    background: $accent;
-  }
+def ingest_concurrently(files: list) -> list:
+  """
+  Upload all files at once; the uploads are independent and I/O bound.
+
+  Returns the Response (or the raised exception) for each file, in input order.
   """
+  with ThreadPoolExecutor(max_workers=len(files)) as pool:
+    futures = [pool.submit(post_ingest, path, fmt) for path, fmt in files]
 
-  MODES = {
-    "ingest": IngestScreen,
-    "compliance": ComplianceScreen,
-    "reconciliation": ReconciliationScreen,
-  }
-
-  BINDINGS = [
-    Binding("i", "switch_screen('ingest')", "Ingest", show=True),
-    Binding("c", "switch_screen('compliance')", "Compliance", show=True),
-    Binding("r", "switch_screen('reconciliation')", "Reconciliation", show=True),
-    Binding("q", "quit", "Quit", show=True),
-  ]
-
-  def on_mount(self) -> None:
-    """Initialize app and ingest data."""
-    self.title = "Portfolio Data Clearinghouse"
-    self.sub_title = "Interactive Reconciliation Demo"
-
-    # Check if API is running
+  outcomes = []
+  for future in futures:
     try:
-      response = requests.get(f"{BASE_URL}/health", timeout=2)
-      if response.status_code != 200:
-        self.exit(message="ERROR: API is not healthy!")
-        return
-    except:
-      self.exit(message="ERROR: API is not running! Start with: python app.py")
-      return
-
-    # Ingest files on startup
-    self.ingest_files()
-
-    # Switch to ingest screen
-    self.switch_mode("ingest")
-
-  def action_switch_screen(self, screen_name: str) -> None:
-    """Switch to a different screen."""
-    self.switch_mode(screen_name)
-
-  def ingest_files(self) -> None:
-    """Ingest sample data files based on format selection."""
-    files = [("sample_data/bank_positions.yaml", "YAML_POSITIONS")]
-
-    # Add trade files based on format selection
-    if APP_DATA["format"] == "1":
-      files.insert(0, ("sample_data/trades_format1.csv", "CSV_FORMAT1"))
-    elif APP_DATA["format"] == "2":
-      files.insert(0, ("sample_data/trades_format2.txt", "PIPE_FORMAT2"))
-    elif APP_DATA["format"] == "both":
-      files.insert(0, ("sample_data/trades_format1.csv", "CSV_FORMAT1"))
-      files.append(("sample_data/trades_format2.txt", "PIPE_FORMAT2"))
-
-    APP_DATA["ingest_results"] = []
-
-    for file_path, file_format in files:
-      try:
-        with open(file_path, "rb") as f:
-          files_data = {"file": (os.path.basename(file_path), f)}
-          form_data = {"file_format": file_format}
-          response = requests.post(
-            f"{BASE_URL}/ingest",
-            files=files_data,
-            data=form_data,
-            timeout=10,
-          )
-
-        if response.status_code in [200, 207]:
-          APP_DATA["ingest_results"].append(response.json())
-
-      except Exception as e:
-        APP_DATA["ingest_results"].append({
-          "file_name": os.path.basename(file_path),
-          "file_format": file_format,
-          "records_processed": 0,
-          "records_valid": 0,
-          "records_failed": 0,
-          "success_rate": "0.00%",
-          "error": str(e),
-        })
+      outcomes.append(future.result())
+    except Exception as e:
+      outcomes.append(e)
+  return outcomes
 
 
 def ingest_files_simple(format_choice: str) -> None:
   """Ingest files for simple mode."""
-  files = [("sample_data/bank_positions.yaml", "YAML_POSITIONS")]
+  files = ingest_file_list(format_choice)
 
-  if format_choice == "1":
-    files.insert(0, ("sample_data/trades_format1.csv", "CSV_FORMAT1"))
-  elif format_choice == "2":
-    files.insert(0, ("sample_data/trades_format2.txt", "PIPE_FORMAT2"))
-  elif format_choice == "both":
-    files.insert(0, ("sample_data/trades_format1.csv", "CSV_FORMAT1"))
-    files.append(("sample_data/trades_format2.txt", "PIPE_FORMAT2"))
+  for (file_path, _), outcome in zip(files, ingest_concurrently(files)):
+    if isinstance(outcome, Exception):
+      print(f"Error ingesting {file_path}: {outcome}", file=sys.stderr)
 
-  for file_path, file_format in files:
-    try:
-      with open(file_path, "rb") as f:
-        files_data = {"file": (os.path.basename(file_path), f)}
-        form_data = {"file_format": file_format}
-        requests.post(
-          f"{BASE_URL}/ingest",
-          files=files_data,
-          data=form_data,
-          timeout=10,
-        )
-    except Exception as e:
-      print(f"Error ingesting {file_path}: {e}", file=sys.stderr)
+
+def fetch_positions(accounts: list, date: str) -> list:
+  """Fetch every account's positions in one batched request, as flat rows."""
+  rows = []
+  try:
+    response = SESSION.get(
+      f"{BASE_URL}/positions",
+      params={"accounts": ",".join(accounts), "date": date},
+      timeout=5,
+    )
+    if response.status_code == 200:
+      data = parse_json(response)
+      for pos in data.get("positions", []):
+        rows.append({
+          "account": pos["account_id"],
+          "ticker": pos["ticker"],
+          "shares": pos["shares"],
+          "market_value": pos["market_value"],
+          "cost_basis": pos["cost_basis"],
+        })
+  except Exception as e:
+    print(f"Error fetching positions: {e}", file=sys.stderr)
+  return rows
+
+
+def format_violation_line(v: dict) -> str:
+  """One simple-mode line for a concentration violation."""
+  return (
+    f" {v['account_id']:6s} {v['ticker']:6s} "
+    f"{v['shares']:6d} shares "
+    f"${v['market_value']:12,.2f} / ${v['account_total_value']:12,.2f} "
+    f"{v['concentration_pct']:5.2f}% "
+    f"(excess: +{v['excess_pct']:5.2f}%)"
+  )
 
 
 def simple_output(format_choice: str) -> None:
@@ -602,7 +191,7 @@ def simple_output(format_choice: str) -> None:
 
   # Check API health
   try:
-    response = requests.get(f"{BASE_URL}/health", timeout=2)
+    response = SESSION.get(f"{BASE_URL}/health", timeout=2)
     if response.status_code != 200:
       print("ERROR: API is not healthy!", file=sys.stderr)
       sys.exit(1)
@@ -610,10 +199,8 @@ def simple_output(format_choice: str) -> None:
     print("ERROR: API is not running! Start with: python app.py", file=sys.stderr)
     sys.exit(1)
 
-  # Ingest files
-  import time
+  # Ingest files; /ingest commits before it responds, so no wait is needed
   ingest_files_simple(format_choice)
-  time.sleep(1.5) # Give server time to process ingestion
 
   # Fetch all positions
   print("=" * 80)
@@ -622,28 +209,7 @@ def simple_output(format_choice: str) -> None:
   print()
 
   accounts = ["ACC001", "ACC002", "ACC003", "ACC004"]
-  all_positions = []
-
-  for account in accounts:
-    try:
-      response = requests.get(
-        f"{BASE_URL}/positions",
-        params={"account": account, "date": date},
-        timeout=5,
-      )
-      if response.status_code == 200:
-        data = response.json()
-        if "positions" in data and len(data["positions"]) > 0:
-          for pos in data["positions"]:
-            all_positions.append({
-              "account": account,
-              "ticker": pos["ticker"],
-              "shares": pos["shares"],
-              "market_value": pos["market_value"],
-              "cost_basis": pos["cost_basis"],
-            })
-    except Exception as e:
-      print(f"Error fetching positions for {account}: {e}", file=sys.stderr)
+  all_positions = fetch_positions(accounts, date)
 
   # Sort by account then ticker
   all_positions.sort(key=lambda x: (x["account"], x["ticker"]))
@@ -668,6 +234,15 @@ def simple_output(format_choice: str) -> None:
       print(f" {pos['ticker']:6s} {pos['shares']:6d} shares "
          f"@ ${pos['cost_basis']:8.2f} = ${pos['market_value']:12.2f}")
 
+  # Reconciliation and compliance are independent; fetch both at once
+  with ThreadPoolExecutor(max_workers=2) as pool:
+    recon_future = pool.submit(
+      SESSION.get, f"{BASE_URL}/reconciliation", params={"date": date}, timeout=5
+    )
+    compliance_future = pool.submit(
+      SESSION.get, f"{BASE_URL}/compliance/concentration", params={"date": date}, timeout=5
+    )
+
   # Reconciliation
   print()
   print("=" * 80)
@@ -676,12 +251,7 @@ def simple_output(format_choice: str) -> None:
   print()
 
   try:
-    response = requests.get(
-      f"{BASE_URL}/reconciliation",
-      params={"date": date},
-      timeout=5,
-    )
-    data = response.json()
+    data = parse_json(recon_future.result())
 
     # De-duplicate if both formats loaded
     if format_choice == "both":
@@ -720,12 +290,7 @@ def simple_output(format_choice: str) -> None:
   print()
 
   try:
-    response = requests.get(
-      f"{BASE_URL}/compliance/concentration",
-      params={"date": date},
-      timeout=5,
-    )
-    data = response.json()
+    data = parse_json(compliance_future.result())
 
     # Show violations from TRADES
     print("FROM TRADE CALCULATIONS:")
@@ -735,12 +300,7 @@ def simple_output(format_choice: str) -> None:
       print(" No violations found.")
     else:
       violations = from_trades.get("violations", [])
-      for v in violations:
-        print(f" {v['account_id']:6s} {v['ticker']:6s} "
-           f"{v['shares']:6d} shares "
-           f"${v['market_value']:12,.2f} / ${v['account_total_value']:12,.2f} "
-           f"{v['concentration_pct']:5.2f}% "
-           f"(excess: +{v['excess_pct']:5.2f}%)")
+      print("\n".join(map(format_violation_line, violations)))
 
     print()
 
@@ -752,12 +312,7 @@ def simple_output(format_choice: str) -> None:
       print(" No violations found (or no bank data).")
     else:
       violations = from_bank.get("violations", [])
-      for v in violations:
-        print(f" {v['account_id']:6s} {v['ticker']:6s} "
-           f"{v['shares']:6d} shares "
-           f"${v['market_value']:12,.2f} / ${v['account_total_value']:12,.2f} "
-           f"{v['concentration_pct']:5.2f}% "
-           f"(excess: +{v['excess_pct']:5.2f}%)")
+      print("\n".join(map(format_violation_line, violations)))
 
   except Exception as e:
     print(f"Error fetching compliance: {e}", file=sys.stderr)
@@ -786,11 +341,12 @@ def main():
     # Simple mode: just print to stdout
     simple_output(args.format)
   else:
-    # TUI mode
-    APP_DATA["format"] = args.format
-    app = PortfolioReconApp()
-    app.run()
+    # TUI mode; Textual is only imported when it is needed
+    from demo_tui import run_tui
+    run_tui(args.format)
 
 
 if __name__ == "__main__":
+  # Let demo_tui's `import demo` share this module's state when run as a script
+  sys.modules.setdefault("demo", sys.modules[__name__])
   main()
@@ -0,0 +1,596 @@
+"""
+Textual screens for the interactive portfolio reconciliation demo.
+Imported lazily by demo.py so --simple mode skips Textual entirely.
+"""
+import os
+import asyncio
+from functools import lru_cache
+from textual.app import App, ComposeResult
+from textual.containers import Container, Horizontal, Vertical, ScrollableContainer
+from textual.widgets import Header, Footer, Static, OptionList, Label
+from textual.widgets.option_list import Option
+from textual.binding import Binding
+from textual.screen import Screen
+from rich.console import Group
+from rich.panel import Panel
+from rich.table import Table
+from rich import box
+
+from demo import (
+  APP_DATA,
+  BASE_URL,
+  SESSION,
+  parse_json,
+  ingest_file_list,
+  post_ingest,
+)
+
+# Normalized account filters accepted by the report screens
+_ACCOUNTS_NORM = frozenset(acc.lower() for acc in APP_DATA["accounts"]) | {"all"}
+
+
+async def fetch_report(name: str, path: str, prepare=None) -> dict:
+  """
+  GET a date-keyed report, reusing the cached payload for repeat views.
+
+  `prepare` adjusts a fresh payload once before it is cached.
+  """
+  key = (name, APP_DATA["selected_date"])
+  if key in APP_DATA["cache"]:
+    return APP_DATA["cache"][key]
+
+  # Run the blocking request off the event loop so the UI stays responsive
+  response = await asyncio.to_thread(
+    SESSION.get,
+    f"{BASE_URL}{path}",
+    params={"date": APP_DATA["selected_date"]},
+    timeout=5,
+  )
+  data = parse_json(response)
+  if prepare:
+    prepare(data)
+  if response.ok:
+    APP_DATA["cache"][key] = data
+  return data
+
+
+def dedupe_both_formats(data: dict) -> None:
+  """Halve expected shares when both trade formats were ingested."""
+  # This keeps the server behavior correct while cleaning up the display
+  if APP_DATA["format"] == "both":
+    for disc in data["discrepancies"]:
+      disc["expected_shares"] = disc["expected_shares"] // 2
+      disc["difference"] = disc["actual_shares"] - disc["expected_shares"]
+
+
+# Row fields rendered by the violations and discrepancies tables, in column order
+VIOLATION_FIELDS = (
+  "account_id", "ticker", "shares", "market_value",
+  "account_total_value", "concentration_pct", "excess_pct",
+)
+DISCREPANCY_FIELDS = (
+  "account_id", "ticker", "expected_shares", "actual_shares", "difference", "status",
+)
+
+
+def table_key(rows: list, fields: tuple) -> tuple:
+  """Hashable snapshot of the fields a table renders, used as its cache key."""
+  return tuple(tuple(row[field] for field in fields) for row in rows)
+
+
+@lru_cache(maxsize=256)
+def format_dollars(value: float) -> str:
+  """Format a dollar amount, reusing the string for repeated values."""
+  return f"${value:,.2f}"
+
+
+@lru_cache(maxsize=64)
+def build_violations_table(rows: tuple, header_style: str) -> Table:
+  """Rich table of concentration violations (trade or bank sourced)."""
+  table = Table(
+    box=box.ROUNDED,
+    show_header=True,
+    header_style=header_style,
+  )
+  table.add_column("Account", style="cyan")
+  table.add_column("Ticker", style="yellow")
+  table.add_column("Shares", justify="right")
+  table.add_column("Market Value", justify="right")
+  table.add_column("Account Total", justify="right")
+  table.add_column("Concentration %", justify="right", style="red bold")
+  table.add_column("Excess %", justify="right", style="red")
+
+  for account_id, ticker, shares, market_value, total_value, concentration, excess in rows:
+    table.add_row(
+      account_id,
+      ticker,
+      str(shares),
+      format_dollars(market_value),
+      format_dollars(total_value),
+      f"{concentration:.2f}%",
+      f"+{excess:.2f}%",
+    )
+  return table
+
+
+@lru_cache(maxsize=32)
+def build_recon_table(rows: tuple, account_label: str) -> Table:
+  """Rich table of reconciliation discrepancies."""
+  table = Table(
+    box=box.DOUBLE,
+    show_header=True,
+    header_style="bold yellow",
+    title=f"RECONCILIATION DISCREPANCIES ({account_label})",
+  )
+  table.add_column("Account", style="cyan")
+  table.add_column("Ticker", style="yellow")
+  table.add_column("Expected\n(Trades)", justify="right", style="green")
+  table.add_column("Actual\n(Bank)", justify="right", style="blue")
+  table.add_column("Difference", justify="right")
+  table.add_column("Status", style="bold")
+
+  for account_id, ticker, expected, actual, diff, status_code in rows:
+    diff_style = "red bold" if diff != 0 else "green"
+    status = status_code.replace("_", " ").title()
+    status_style = "red" if "mismatch" in status_code or "missing" in status_code else "yellow"
+
+    table.add_row(
+      account_id,
+      ticker,
+      str(expected),
+      str(actual),
+      f"[{diff_style}]{diff:+d}[/{diff_style}]",
+      f"[{status_style}]{status}[/{status_style}]",
+    )
+  return table
+
+
+def clear_render_caches() -> None:
+  """Drop memoized tables once new data has been ingested."""
+  build_violations_table.cache_clear()
+  build_recon_table.cache_clear()
+
+
+# (label, id) for the sidebar account selector; Options are built per screen
+_ACCOUNT_OPTIONS = [("All Accounts", "all")] + [(acc, acc) for acc in APP_DATA["accounts"]]
+
+
+class _BaseReconScreen(Screen):
+  """Shared key bindings and account sidebar for the demo screens."""
+
+  BINDINGS = [
+    Binding("i", "app.switch_screen('ingest')", "Ingest", show=True),
+    Binding("c", "app.switch_screen('compliance')", "Compliance", show=True),
+    Binding("r", "app.switch_screen('reconciliation')", "Reconciliation", show=True),
+    Binding("q", "app.quit", "Quit", show=True),
+  ]
+
+  # fetch_report() cache name for the screen's data, if it has any
+  REPORT_NAME = None
+  _pending_refresh = None
+
+  async def on_option_list_option_selected(self, event: OptionList.OptionSelected) -> None:
+    """Handle account selection, debouncing refreshes that need a fetch."""
+    if event.option.id == "all":
+      APP_DATA["selected_account"] = "all"
+    else:
+      APP_DATA["selected_account"] = event.option.id
+
+    if self._pending_refresh is not None:
+      self._pending_refresh.stop()
+      self._pending_refresh = None
+
+    if (self.REPORT_NAME, APP_DATA["selected_date"]) in APP_DATA["cache"]:
+      # Data is local; re-filter straight away
+      await self.refresh_data()
+    else:
+      # Only the last of several quick selections triggers a request
+      self._pending_refresh = self.set_timer(0.2, self.refresh_data)
+
+  @classmethod
+  def _account_sidebar(cls, summary_id: str) -> Vertical:
+    """Account selector plus a summary panel with the given id."""
+    return Vertical(
+      Label("[bold]Account:[/bold]", classes="sidebar-label"),
+      OptionList(
+        *(Option(label, id=option_id) for label, option_id in _ACCOUNT_OPTIONS),
+        id="account-selector",
+      ),
+      Label(""),
+      Static(id=summary_id, classes="sidebar-summary"),
+      id="sidebar",
+    )
+
+
+class IngestScreen(_BaseReconScreen):
+  """Screen showing file ingestion statistics and format comparison."""
+
+  def compose(self) -> ComposeResult:
+    yield Header()
+    yield Container(
+      Static("[bold cyan]File Ingestion Summary[/bold cyan]", id="title"),
+      Static(id="ingest-stats"),
+      Static("\n[bold yellow]Format Equivalence Verification[/bold yellow]"),
+      Static(id="format-comparison"),
+      Static(id="note"),
+      id="main-content",
+    )
+    yield Footer()
+
+  def on_mount(self) -> None:
+    """Load and display ingestion data."""
+    # These widgets live as long as the screen; look them up once
+    self._stats = self.query_one("#ingest-stats", Static)
+    self._note = self.query_one("#note", Static)
+    self._comparison = self.query_one("#format-comparison", Static)
+    self.update_display()
+
+  def update_display(self) -> None:
+    """Update the ingestion statistics display."""
+    if not APP_DATA["ingest_results"]:
+      self._stats.update(
+        "[dim]No data ingested yet. Ingesting files...[/dim]"
+      )
+      return
+
+    # Create ingestion summary table
+    table = Table(box=box.ROUNDED, show_header=True, header_style="bold magenta")
+    table.add_column("File", style="cyan")
+    table.add_column("Format", style="yellow")
+    table.add_column("Records", justify="right", style="green")
+    table.add_column("Valid", justify="right", style="green")
+    table.add_column("Failed", justify="right", style="red")
+    table.add_column("Success Rate", justify="right", style="blue")
+
+    # Index results by format in the same pass for the comparison below
+    by_format = {}
+    for result in APP_DATA["ingest_results"]:
+      by_format[result["file_format"]] = result
+      table.add_row(
+        result["file_name"],
+        result["file_format"],
+        str(result["records_processed"]),
+        str(result["records_valid"]),
+        str(result["records_failed"]),
+        result["success_rate"],
+      )
+
+    self._stats.update(table)
+
+    # Format comparison - find Format 1 and Format 2
+    format1 = by_format.get("CSV_FORMAT1")
+    format2 = by_format.get("PIPE_FORMAT2")
+
+    # Update note based on format selection
+    if APP_DATA["format"] == "both":
+      self._note.update(
+        "\n[dim italic]Note: Both trade formats ingested for comparison demonstration. "
+        "Reconciliation view de-duplicates on display (divides expected shares by 2).[/dim italic]"
+      )
+    elif APP_DATA["format"] == "1":
+      self._note.update(
+        "\n[dim italic]Note: CSV trade format (Format 1) ingested. "
+        "Use --format 2 or --format both to compare formats.[/dim italic]"
+      )
+    elif APP_DATA["format"] == "2":
+      self._note.update(
+        "\n[dim italic]Note: Pipe-delimited trade format (Format 2) ingested. "
+        "Use --format 1 or --format both to compare formats.[/dim italic]"
+      )
+
+    if format1 and format2:
+      comp_table = Table(box=box.SIMPLE, show_header=True, header_style="bold cyan")
+      comp_table.add_column("Metric", style="yellow")
+      comp_table.add_column("Format 1 (CSV)", justify="right", style="green")
+      comp_table.add_column("Format 2 (Pipe)", justify="right", style="blue")
+      comp_table.add_column("Match", justify="center")
+
+      match_records = format1["records_processed"] == format2["records_processed"]
+      match_success = format1["success_rate"] == format2["success_rate"]
+
+      comp_table.add_row(
+        "Records Processed",
+        str(format1["records_processed"]),
+        str(format2["records_processed"]),
+        "[green]✓[/green]" if match_records else "[red]✗[/red]",
+      )
+      comp_table.add_row(
+        "Success Rate",
+        format1["success_rate"],
+        format2["success_rate"],
+        "[green]✓[/green]" if match_success else "[red]✗[/red]",
+      )
+
+      self._comparison.update(comp_table)
+    else:
+      self._comparison.update(
+        "[dim]Waiting for both trade formats to be ingested...[/dim]"
+      )
+
+
+class ComplianceScreen(_BaseReconScreen):
+  """Screen showing compliance concentration violations."""
+
+  REPORT_NAME = "compliance"
+
+  def compose(self) -> ComposeResult:
+    yield Header()
+    yield Horizontal(
+      ScrollableContainer(Static(id="compliance-details"), id="main-view"),
+      self._account_sidebar("compliance-summary"),
+    )
+    yield Footer()
+
+  async def on_mount(self) -> None:
+    """Load compliance data on mount."""
+    # Set initial selection
+    account_selector = self.query_one("#account-selector", OptionList)
+    account_selector.highlighted = 0 # All Accounts
+    # These widgets live as long as the screen; look them up once
+    self._summary = self.query_one("#compliance-summary", Static)
+    self._details = self.query_one("#compliance-details", Static)
+    await self.refresh_data()
+
+  async def refresh_data(self) -> None:
+    """Fetch and display compliance data."""
+    try:
+      data = await fetch_report(self.REPORT_NAME, "/compliance/concentration")
+
+      # Get violations from both sources
+      from_trades = data.get("from_trades", {})
+      from_bank = data.get("from_bank", {})
+
+      trades_violations = from_trades.get("violations", [])
+      bank_violations = from_bank.get("violations", [])
+
+      # Filter by account if not 'all'
+      account_filter = APP_DATA["selected_account"].strip().lower()
+      if account_filter in _ACCOUNTS_NORM and account_filter != "all":
+        trades_violations = [v for v in trades_violations if v["account_id"].lower() == account_filter]
+        bank_violations = [v for v in bank_violations if v["account_id"].lower() == account_filter]
+
+      # Update sidebar summary
+      summary = (
+        f"[bold]Filter:[/bold]\n{APP_DATA['selected_account']}\n\n"
+        f"[bold]From Trades:[/bold]\n{len(trades_violations)}\n\n"
+        f"[bold]From Bank:[/bold]\n{len(bank_violations)}\n"
+      )
+      self._summary.update(summary)
+
+      # Build combined display
+      output = ""
+
+      # FROM TRADES section
+      output += "[bold cyan]FROM TRADE CALCULATIONS[/bold cyan]\n"
+      if len(trades_violations) > 0:
+        table = build_violations_table(
+          table_key(trades_violations, VIOLATION_FIELDS), "bold cyan"
+        )
+      else:
+        table = "[dim]No violations[/dim]"
+
+      output_trades = table
+
+      # FROM BANK section
+      if len(bank_violations) > 0:
+        table2 = build_violations_table(
+          table_key(bank_violations, VIOLATION_FIELDS), "bold magenta"
+        )
+      else:
+        table2 = "[dim]No violations (or no bank data)[/dim]"
+
+      # Combine both sections using Rich Text
+      group = Group(
+        Panel(output_trades, title="[bold cyan]FROM TRADE CALCULATIONS[/bold cyan]", border_style="cyan"),
+        "",
+        Panel(table2, title="[bold magenta]FROM BANK POSITIONS[/bold magenta]", border_style="magenta"),
+      )
+
+      self._details.update(group)
+
+    except Exception as e:
+      self._details.update(
+        f"[bold red]Error: {e}[/bold red]"
+      )
+
+
+class ReconciliationScreen(_BaseReconScreen):
+  """Screen showing trade vs bank position reconciliation."""
+
+  REPORT_NAME = "recon"
+
+  def compose(self) -> ComposeResult:
+    yield Header()
+    yield Horizontal(
+      ScrollableContainer(Static(id="recon-details"), id="main-view"),
+      self._account_sidebar("recon-summary"),
+    )
+    yield Footer()
+
+  async def on_mount(self) -> None:
+    """Load reconciliation data on mount."""
+    # Set initial selection
+    account_selector = self.query_one("#account-selector", OptionList)
+    account_selector.highlighted = 1 # ACC001
+    # These widgets live as long as the screen; look them up once
+    self._summary = self.query_one("#recon-summary", Static)
+    self._details = self.query_one("#recon-details", Static)
+    await self.refresh_data()
+
+  async def refresh_data(self) -> None:
+    """Fetch and display reconciliation data."""
+    try:
+      # DE-DUPLICATE: Divide expected shares by 2 if both formats were ingested
+      data = await fetch_report(self.REPORT_NAME, "/reconciliation", prepare=dedupe_both_formats)
+
+      # Filter by account if not 'all'
+      account_filter = APP_DATA["selected_account"].strip().lower()
+      discrepancies = data["discrepancies"]
+
+      if account_filter in _ACCOUNTS_NORM and account_filter != "all":
+        discrepancies = [
+          d for d in discrepancies
+          if d["account_id"].lower() == account_filter
+        ]
+
+      # Update sidebar summary
+      summary = (
+        f"[bold]Filter:[/bold]\n{APP_DATA['selected_account']}\n\n"
+        f"[bold]Date:[/bold]\n{data['date']}\n\n"
+        f"[bold]Discrepancies:[/bold]\n{len(discrepancies)}\n"
+      )
+      self._summary.update(summary)
+
+      # Discrepancies table
+      if len(discrepancies) > 0:
+        table = build_recon_table(
+          table_key(discrepancies, DISCREPANCY_FIELDS), APP_DATA["selected_account"]
+        )
+        self._details.update(table)
+      else:
+        self._details.update(
+          f"\n\n[bold green]✓ All positions reconciled for {APP_DATA['selected_account']}[/bold green]"
+        )
+
+    except Exception as e:
+      self._details.update(
+        f"[bold red]Error: {e}[/bold red]"
+      )
+
+
+class PortfolioReconApp(App):
+  """Interactive TUI for Portfolio Reconciliation System."""
+
+  CSS = """
+  #main-content {
+    padding: 1 2;
+  }
+
+  #title {
+    text-align: center;
+    padding: 1 0;
+    height: 3;
+  }
+
+  #main-view {
+    width: 3fr;
+    height: 100%;
+    border: solid $accent;
+    padding: 1;
+  }
+
+  #sidebar {
+    width: 1fr;
+    height: 100%;
+    border: solid $primary;
+    padding: 1;
+  }
+
+  .sidebar-label {
+    margin-bottom: 1;
+    text-style: bold;
+  }
+
+  .sidebar-value {
+    margin-bottom: 1;
+    color: $accent;
+  }
+
+  .sidebar-summary {
+    margin-top: 2;
+    padding: 1;
+    border: solid $secondary;
+  }
+
+  #account-selector {
+    height: auto;
+    max-height: 10;
+    margin-bottom: 1;
+  }
+
+  #date-display {
+    padding: 1;
+    background: $surface;
+    margin-bottom: 1;
+  }
+
+  OptionList {
+    border: solid $primary;
+  }
+
+  OptionList > .option-list--option-highlighted {
+    background: $accent;
+  }
+  """
+
+  MODES = {
+    "ingest": IngestScreen,
+    "compliance": ComplianceScreen,
+    "reconciliation": ReconciliationScreen,
+  }
+
+  BINDINGS = [
+    Binding("i", "switch_screen('ingest')", "Ingest", show=True),
+    Binding("c", "switch_screen('compliance')", "Compliance", show=True),
+    Binding("r", "switch_screen('reconciliation')", "Reconciliation", show=True),
+    Binding("q", "quit", "Quit", show=True),
+  ]
+
+  async def on_mount(self) -> None:
+    """Initialize app and ingest data."""
+    self.title = "Portfolio Data Clearinghouse"
+    self.sub_title = "Interactive Reconciliation Demo"
+
+    # Check if API is running
+    try:
+      response = await asyncio.to_thread(SESSION.get, f"{BASE_URL}/health", timeout=2)
+      if response.status_code != 200:
+        self.exit(message="ERROR: API is not healthy!")
+        return
+    except:
+      self.exit(message="ERROR: API is not running! Start with: python app.py")
+      return
+
+    # Ingest files on startup
+    await self.ingest_files()
+
+    # Switch to ingest screen
+    self.switch_mode("ingest")
+
+  def action_switch_screen(self, screen_name: str) -> None:
+    """Switch to a different screen."""
+    self.switch_mode(screen_name)
+
+  async def ingest_files(self) -> None:
+    """Ingest sample data files based on format selection, all uploads at once."""
+    files = ingest_file_list(APP_DATA["format"])
+
+    APP_DATA["ingest_results"] = []
+    APP_DATA["cache"].clear()
+    clear_render_caches()
+
+    outcomes = await asyncio.gather(
+      *(asyncio.to_thread(post_ingest, path, fmt) for path, fmt in files),
+      return_exceptions=True,
+    )
+
+    for (file_path, file_format), outcome in zip(files, outcomes):
+      if isinstance(outcome, Exception):
+        APP_DATA["ingest_results"].append({
+          "file_name": os.path.basename(file_path),
+          "file_format": file_format,
+          "records_processed": 0,
+          "records_valid": 0,
+          "records_failed": 0,
+          "success_rate": "0.00%",
+          "error": str(outcome),
+        })
+      elif outcome.status_code in [200, 207]:
+        APP_DATA["ingest_results"].append(parse_json(outcome))
+
+
+def run_tui(format_choice: str) -> None:
+  """Run the interactive TUI for the given trade format selection."""
+  APP_DATA["format"] = format_choice
+  app = PortfolioReconApp()
+  app.run()
@@ -1,25 +1,74 @@
 """
 Data ingestion logic with quality checks.
 """
+import io
+import os
 import csv
 import yaml
 import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import List, Tuple
-from decimal import Decimal
+from typing import Dict, List, Tuple
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
+from pydantic import ValidationError
 
-from models import Account, Trade, Position
+from models import Account, IngestVersion, Trade, Position
 from validators import (
   TradeFormat1,
   TradeFormat2,
   BankPositionFile,
   DataQualityReport,
+  TRADE_FMT1_ADAPTER,
+  TRADE_FMT2_ADAPTER,
 )
 
 logger = logging.getLogger(__name__)
 
+# Compiled pydantic-core validators, bound once so rows skip the model __init__ path
+validate_format1 = TradeFormat1.__pydantic_validator__.validate_python
+validate_format2 = TradeFormat2.__pydantic_validator__.validate_python
+validate_bank_file = BankPositionFile.__pydantic_validator__.validate_python
 
+# libyaml's C loader parses position files far faster than the pure-Python one
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+if YamlLoader is yaml.SafeLoader:
+  logger.warning("libyaml not available, YAML position files will use the pure-Python loader")
+
+# Bumped inside each ingest's transaction so every worker's caches see the commit
+INGEST_VERSION_BUMP = update(IngestVersion).values(version=IngestVersion.version + 1)
+
+
+def bump_ingest_version(session: Session) -> None:
+  """Mark the database as changed by the ingest about to be committed."""
+  session.execute(INGEST_VERSION_BUMP)
+
+
+# Rows validated per pydantic-core list call; small enough that the models
+# are freed quickly instead of piling up for the garbage collector
+VALIDATE_BATCH_SIZE = 256
+
+# Rows buffered per multi-row INSERT during ingestion
+INSERT_BATCH_SIZE = 1000
+
+# Core table inserts built once; executemany skips ORM bulk-insert bookkeeping
+TRADE_INSERT = Trade.__table__.insert()
+POSITION_INSERT = Position.__table__.insert()
+
+# Read buffer for ingest files; far fewer read() calls than the 8 KiB default
+READ_BUFFER_BYTES = 1024 * 1024
+
+# Trade files larger than this are validated in parallel, one chunk per task
+PARALLEL_CHUNK_BYTES = 32 * 1024 * 1024
+
+
+@lru_cache(maxsize=1024)
 def extract_custodian_name(custodian_ref: str) -> str:
   """
   Extract custodian name from custodian reference.
@@ -27,31 +76,318 @@ def extract_custodian_name(custodian_ref: str) -> str:
   """
   if not custodian_ref:
     return None
-  parts = custodian_ref.split("_")
-  if len(parts) >= 2:
-    return f"CUSTODIAN_{parts[1]}"
+  _, sep, rest = custodian_ref.partition("_")
+  if sep:
+    return f"CUSTODIAN_{rest.partition('_')[0]}"
   return None
 
 
-def ensure_account_exists(session: Session, account_id: str, custodian: str = None) -> Account:
+def load_known_accounts(session: Session) -> Dict[str, str]:
   """
-  Ensure account exists in database, create if not.
-  Update custodian if provided and not already set.
+  Load every account_id with its custodian in a single query.
   """
-  account = session.query(Account).filter_by(account_id=account_id).first()
+  return dict(session.execute(select(Account.account_id, Account.custodian_name)).all())
+
 
-  if not account:
-    account = Account(account_id=account_id, custodian_name=custodian)
-    session.add(account)
+def ensure_account_cached(
+  known: Dict[str, str],
+  pending_accounts: Dict[str, str],
+  account_id: str,
+  custodian: str = None,
+) -> bool:
+  """
+  Ensure account exists using the in-memory cache.
+  New accounts and custodian fills are queued in pending_accounts
+  for upsert_accounts. Returns True if the account was created.
+  """
+  if account_id not in known:
+    known[account_id] = pending_accounts[account_id] = custodian
     logger.info(f"Created new account: {account_id} with custodian: {custodian}")
-    return account
+    return True
 
   # Update custodian if provided and not already set
-  if custodian and not account.custodian_name:
-    account.custodian_name = custodian
+  if custodian and not known[account_id]:
+    known[account_id] = pending_accounts[account_id] = custodian
     logger.info(f"Updated account {account_id} with custodian: {custodian}")
 
-  return account
+  return False
+
+
+# Dialects whose INSERT supports ON CONFLICT ... DO UPDATE
+UPSERT_INSERTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+
+def upsert_accounts(session: Session, pending_accounts: Dict[str, str]) -> None:
+  """
+  Insert queued accounts and fill missing custodians in one statement,
+  keeping any custodian already stored.
+  """
+  if not pending_accounts:
+    return
+
+  rows = [
+    {"account_id": account_id, "custodian_name": custodian}
+    for account_id, custodian in pending_accounts.items()
+  ]
+  dialect_insert = UPSERT_INSERTS.get(session.get_bind().dialect.name)
+  if dialect_insert is not None:
+    stmt = dialect_insert(Account)
+    stmt = stmt.on_conflict_do_update(
+      index_elements=[Account.account_id],
+      set_={"custodian_name": func.coalesce(Account.custodian_name, stmt.excluded.custodian_name)},
+    )
+    session.execute(stmt, rows)
+  else:
+    existing = set(session.scalars(
+      select(Account.account_id).where(Account.account_id.in_(pending_accounts))
+    ))
+    new_rows = [row for row in rows if row["account_id"] not in existing]
+    if new_rows:
+      session.execute(insert(Account), new_rows)
+    for row in rows:
+      if row["account_id"] in existing:
+        session.execute(
+          update(Account)
+          .where(Account.account_id == row["account_id"], Account.custodian_name.is_(None))
+          .values(custodian_name=row["custodian_name"])
+        )
+  pending_accounts.clear()
+
+
+def flush_rows(session: Session, table_insert, rows: List[dict]) -> None:
+  """
+  Execute a prebuilt Core insert for the buffered rows in one executemany
+  and clear the buffer.
+  """
+  if rows:
+    session.execute(table_insert, rows)
+    rows.clear()
+
+
+def format1_trade(validated: TradeFormat1, file_name: str) -> dict:
+  """
+  Build the trade record for a validated Format 1 CSV row.
+  market_value is left for fill_format1_market_values.
+  """
+  # Calculate quantity (negative for SELL)
+  quantity = validated.quantity
+  if validated.trade_type == "SELL":
+    quantity = -quantity
+
+  return dict(
+    trade_date=validated.trade_date,
+    account_id=validated.account_id,
+    ticker=validated.ticker,
+    quantity=quantity,
+    price=round(validated.price, 2),
+    trade_type=validated.trade_type,
+    settlement_date=validated.settlement_date,
+    file_format="CSV_FORMAT1",
+    source_file=file_name,
+  )
+
+
+def format2_trade(validated: TradeFormat2, file_name: str) -> dict:
+  """
+  Build the trade record for a validated Format 2 pipe-delimited row.
+  Money is rounded to the columns' 2-place scale, which floats don't enforce.
+  """
+  price = validated.derived_price
+  return dict(
+    trade_date=validated.report_date,
+    account_id=validated.account_id,
+    ticker=validated.ticker,
+    quantity=validated.shares,
+    price=None if price is None else round(price, 2),
+    market_value=round(validated.market_value, 2),
+    source_system=validated.source_system,
+    file_format="PIPE_FORMAT2",
+    source_file=file_name,
+  )
+
+
+# Batch validator, single-row validator, record builder and delimiter per trade format
+TRADE_PARSERS = {
+  "CSV_FORMAT1": (TRADE_FMT1_ADAPTER.validate_python, validate_format1, format1_trade, ","),
+  "PIPE_FORMAT2": (TRADE_FMT2_ADAPTER.validate_python, validate_format2, format2_trade, "|"),
+}
+
+
+def file_chunks(file_path: str) -> List[Tuple[int, int]]:
+  """
+  Split a file into byte ranges of PARALLEL_CHUNK_BYTES.
+  """
+  size = os.path.getsize(file_path)
+  return [
+    (start, min(start + PARALLEL_CHUNK_BYTES, size))
+    for start in range(0, size, PARALLEL_CHUNK_BYTES)
+  ] or [(0, 0)]
+
+
+def validate_trade_batch(
+  file_format: str,
+  rows: List[dict],
+  indexes: List[int],
+  file_name: str,
+  trades: List[dict],
+  errors: List[Tuple[int, str]],
+) -> None:
+  """
+  Validate rows in one list call, appending their records to trades.
+  If any row fails, the batch is revalidated row by row so each bad row
+  reports its own (index, message) in errors.
+  """
+  validate_rows, validate_row, build_trade, _ = TRADE_PARSERS[file_format]
+  try:
+    trades.extend([build_trade(validated, file_name) for validated in validate_rows(rows)])
+  except ValidationError:
+    for index, row in zip(indexes, rows):
+      try:
+        trades.append(build_trade(validate_row(row), file_name))
+      except Exception as e:
+        errors.append((index, str(e)))
+
+
+def parse_trade_chunk(
+  file_path: str, start: int, end: int, file_format: str
+) -> Tuple[int, List[dict], List[Tuple[int, str]]]:
+  """
+  Validate the rows whose lines start within [start, end) of a trade file.
+  A chunk that starts mid-line skips ahead to the next newline; the line
+  it lands in belongs to the previous chunk. Fields with embedded newlines
+  are not supported. Returns (rows processed, trades, errors) where each
+  error is (row index within the chunk, message).
+  """
+  delimiter = TRADE_PARSERS[file_format][3]
+  file_name = Path(file_path).name
+
+  with open(file_path, "rb", buffering=READ_BUFFER_BYTES) as f:
+    header = f.readline()
+    if start > 0:
+      f.seek(start - 1)
+      f.readline()
+    pos = f.tell()
+    lines = [header]
+    while pos < end:
+      line = f.readline()
+      if not line:
+        break
+      lines.append(line)
+      pos += len(line)
+
+  trades = []
+  errors = []
+  batch = []
+  batch_indexes = []
+  processed = 0
+  # Plain csv.reader rows zipped against the header once, skipping blank lines
+  reader = csv.reader(io.StringIO(b"".join(lines).decode()), delimiter=delimiter)
+  columns = next(reader, [])
+  for values in reader:
+    if not values:
+      continue
+    index = processed
+    processed += 1
+    if len(values) != len(columns):
+      errors.append((index, f"Expected {len(columns)} fields, got {len(values)}"))
+      continue
+    batch.append(dict(zip(columns, values)))
+    batch_indexes.append(index)
+    if len(batch) == VALIDATE_BATCH_SIZE:
+      validate_trade_batch(file_format, batch, batch_indexes, file_name, trades, errors)
+      batch = []
+      batch_indexes = []
+  validate_trade_batch(file_format, batch, batch_indexes, file_name, trades, errors)
+
+  errors.sort()
+  return processed, trades, errors
+
+
+def iter_trade_chunks(file_path: str, file_format: str):
+  """
+  Yield parse_trade_chunk results in file order. Multi-chunk files are
+  parsed across a process pool when more than one CPU is available, with at
+  most two chunks per worker in flight so parsed rows never pile up in memory.
+  """
+  chunks = file_chunks(file_path)
+  workers = min(len(chunks), os.cpu_count() or 1)
+  if workers < 2:
+    for start, end in chunks:
+      yield parse_trade_chunk(file_path, start, end, file_format)
+    return
+
+  # Never fork the threaded server: its locks and logging thread don't survive it
+  if "forkserver" in multiprocessing.get_all_start_methods():
+    context = multiprocessing.get_context("forkserver")
+    # Workers then fork from a server that has already imported this module
+    context.set_forkserver_preload([__name__])
+  else:
+    context = multiprocessing.get_context("spawn")
+
+  with ProcessPoolExecutor(workers, mp_context=context) as pool:
+    remaining = iter(chunks)
+    pending = deque(
+      pool.submit(parse_trade_chunk, file_path, start, end, file_format)
+      for start, end in islice(remaining, 2 * workers)
+    )
+    try:
+      while pending:
+        result = pending.popleft().result()
+        for start, end in islice(remaining, 1):
+          pending.append(pool.submit(parse_trade_chunk, file_path, start, end, file_format))
+        yield result
+    finally:
+      for future in pending:
+        future.cancel()
+
+
+def ingest_trades(session: Session, file_path: str, report: DataQualityReport) -> set:
+  """
+  Parse, validate and insert a delimited trade file, filling in report.
+  Returns the custodians seen. The caller commits.
+  """
+  custodians = set()
+  known = load_known_accounts(session)
+  pending_accounts = {}
+  row_offset = 2 # Start at 2 (header is row 1)
+
+  for processed, trades, errors in iter_trade_chunks(file_path, report.file_format):
+    report.records_processed += processed
+    report.records_valid += len(trades)
+    report.records_failed += len(errors)
+    for index, error in errors:
+      row_num = row_offset + index
+      report.errors.append(f"Row {row_num}: {error}")
+      logger.error(f"Failed to process row {row_num} in {file_path}: {error}")
+    row_offset += processed
+
+    for trade in trades:
+      # Ensure account exists with custodian info, if the format carries it
+      custodian = trade.get("source_system")
+      if custodian:
+        custodians.add(custodian)
+      if ensure_account_cached(
+        known, pending_accounts, trade["account_id"], custodian
+      ):
+        report.new_accounts_created += 1
+
+    upsert_accounts(session, pending_accounts)
+    for batch_start in range(0, len(trades), INSERT_BATCH_SIZE):
+      session.execute(TRADE_INSERT, trades[batch_start:batch_start + INSERT_BATCH_SIZE])
+
+  return custodians
+
+
+def fill_format1_market_values(session: Session) -> None:
+  """
+  Set market_value = price * |quantity| in SQL for freshly inserted Format 1 trades.
+  """
+  session.execute(
+    update(Trade)
+    .where(Trade.market_value.is_(None), Trade.file_format == "CSV_FORMAT1")
+    .values(market_value=func.round(Trade.price * func.abs(Trade.quantity), 2))
+    .execution_options(synchronize_session=False)
+  )
 
 
 def ingest_trade_format1(
@@ -66,49 +402,9 @@ def ingest_trade_format1(
   )
 
   try:
-    with open(file_path, "r") as f:
-      reader = csv.DictReader(f)
-      for row_num, row in enumerate(reader, start=2): # Start at 2 (header is row 1)
-        report.records_processed += 1
-        try:
-          # Validate with Pydantic
-          validated = TradeFormat1(**row)
-
-          # Ensure account exists
-          account = ensure_account_exists(session, validated.account_id)
-          if not session.query(Account).filter_by(account_id=validated.account_id).first():
-            report.new_accounts_created += 1
-
-          # Calculate quantity (negative for SELL)
-          quantity = validated.quantity
-          if validated.trade_type.value == "SELL":
-            quantity = -quantity
-
-          # Calculate market value
-          market_value = validated.price * abs(quantity)
-
-          # Create trade record
-          trade = Trade(
-            trade_date=validated.trade_date,
-            account_id=validated.account_id,
-            ticker=validated.ticker,
-            quantity=quantity,
-            price=validated.price,
-            trade_type=validated.trade_type.value,
-            settlement_date=validated.settlement_date,
-            market_value=market_value,
-            file_format=report.file_format,
-            source_file=report.file_name,
-          )
-          session.add(trade)
-          report.records_valid += 1
-
-        except Exception as e:
-          report.records_failed += 1
-          error_msg = f"Row {row_num}: {str(e)}"
-          report.errors.append(error_msg)
-          logger.error(f"Failed to process row {row_num} in {file_path}: {e}")
-
+    ingest_trades(session, file_path, report)
+    fill_format1_market_values(session)
+    bump_ingest_version(session)
     session.commit()
     logger.info(
       f"Ingested {report.records_valid}/{report.records_processed} "
@@ -134,48 +430,9 @@ def ingest_trade_format2(
     file_format="PIPE_FORMAT2"
   )
 
-  custodians = set()
-
   try:
-    with open(file_path, "r") as f:
-      reader = csv.DictReader(f, delimiter="|")
-      for row_num, row in enumerate(reader, start=2):
-        report.records_processed += 1
-        try:
-          # Validate with Pydantic
-          validated = TradeFormat2(**row)
-
-          # Track custodians
-          custodians.add(validated.source_system)
-
-          # Ensure account exists with custodian info
-          account = ensure_account_exists(
-            session, validated.account_id, validated.source_system
-          )
-          if not session.query(Account).filter_by(account_id=validated.account_id).first():
-            report.new_accounts_created += 1
-
-          # Create trade record
-          trade = Trade(
-            trade_date=validated.report_date,
-            account_id=validated.account_id,
-            ticker=validated.ticker,
-            quantity=validated.shares,
-            price=validated.derived_price,
-            market_value=validated.market_value,
-            source_system=validated.source_system,
-            file_format=report.file_format,
-            source_file=report.file_name,
-          )
-          session.add(trade)
-          report.records_valid += 1
-
-        except Exception as e:
-          report.records_failed += 1
-          error_msg = f"Row {row_num}: {str(e)}"
-          report.errors.append(error_msg)
-          logger.error(f"Failed to process row {row_num} in {file_path}: {e}")
-
+    custodians = ingest_trades(session, file_path, report)
+    bump_ingest_version(session)
     session.commit()
     report.custodians_detected = sorted(list(custodians))
     logger.info(
@@ -205,15 +462,19 @@ def ingest_bank_positions(
   custodians = set()
 
   try:
-    with open(file_path, "r") as f:
-      data = yaml.safe_load(f)
+    with open(file_path, "r", buffering=READ_BUFFER_BYTES) as f:
+      data = yaml.load(f, Loader=YamlLoader)
 
     # Validate with Pydantic
-    validated_file = BankPositionFile(**data)
+    validated_file = validate_bank_file(data)
     report_date = validated_file.report_date
 
+    known = load_known_accounts(session)
+    pending_accounts = {}
+    positions = []
+    # Counted locally: every assignment to the report goes through pydantic's __setattr__
+    valid = failed = 0
     for position_data in validated_file.positions:
-      report.records_processed += 1
       try:
         # Extract custodian from reference
         custodian = extract_custodian_name(position_data.custodian_ref)
@@ -221,31 +482,39 @@ def ingest_bank_positions(
           custodians.add(custodian)
 
         # Ensure account exists with custodian info
-        account = ensure_account_exists(
-          session, position_data.account_id, custodian
-        )
-        if not session.query(Account).filter_by(account_id=position_data.account_id).first():
+        if ensure_account_cached(
+          known, pending_accounts, position_data.account_id, custodian
+        ):
           report.new_accounts_created += 1
 
-        # Create position record
-        position = Position(
+        # Buffer position record
+        positions.append(dict(
           report_date=report_date,
           account_id=position_data.account_id,
           ticker=position_data.ticker,
           shares=position_data.shares,
-          market_value=position_data.market_value,
+          market_value=round(position_data.market_value, 2),
           custodian_ref=position_data.custodian_ref,
           source_file=report.file_name,
-        )
-        session.add(position)
-        report.records_valid += 1
+        ))
+        valid += 1
 
       except Exception as e:
-        report.records_failed += 1
+        failed += 1
         error_msg = f"Position record: {str(e)}"
         report.errors.append(error_msg)
         logger.error(f"Failed to process position in {file_path}: {e}")
 
+      if len(positions) >= INSERT_BATCH_SIZE:
+        upsert_accounts(session, pending_accounts)
+        flush_rows(session, POSITION_INSERT, positions)
+
+    report.records_processed += valid + failed
+    report.records_valid += valid
+    report.records_failed += failed
+    upsert_accounts(session, pending_accounts)
+    flush_rows(session, POSITION_INSERT, positions)
+    bump_ingest_version(session)
     session.commit()
     report.custodians_detected = sorted(list(custodians))
     logger.info(
@@ -3,7 +3,9 @@ SQLAlchemy database models for portfolio reconciliation system.
 """
 from datetime import datetime, date
 from sqlalchemy import (
+  DDL,
   create_engine,
+  event,
   Column,
   Integer,
   String,
@@ -47,12 +49,12 @@ class Trade(Base):
   quantity = Column(Integer, nullable=False) # Positive for BUY, negative for SELL
 
   # Format 1 fields (CSV)
-  price = Column(Numeric(12, 2), nullable=True)
+  price = Column(Numeric(12, 2, asdecimal=False), nullable=True)
   trade_type = Column(String(10), nullable=True) # BUY, SELL
   settlement_date = Column(Date, nullable=True)
 
   # Format 2 fields (pipe-delimited)
-  market_value = Column(Numeric(15, 2), nullable=True)
+  market_value = Column(Numeric(15, 2, asdecimal=False), nullable=True)
   source_system = Column(String(50), nullable=True) # CUSTODIAN_A, etc.
 
   # Metadata
@@ -67,6 +69,9 @@ class Trade(Base):
   __table_args__ = (
     Index("idx_trade_date_account", "trade_date", "account_id"),
     Index("idx_trade_date_ticker", "trade_date", "ticker"),
+    Index("idx_trade_account_date_ticker", "account_id", "trade_date", "ticker"),
+    # Covers the net-shares GROUP BY (account_id, ticker) without touching rows
+    Index("idx_trade_aid_ticker_date_qty", "account_id", "ticker", "trade_date", "quantity"),
   )
 
   def __repr__(self):
@@ -86,7 +91,7 @@ class Position(Base):
   account_id = Column(String(50), ForeignKey("accounts.account_id"), nullable=False)
   ticker = Column(String(20), nullable=False)
   shares = Column(Integer, nullable=False)
-  market_value = Column(Numeric(15, 2), nullable=False)
+  market_value = Column(Numeric(15, 2, asdecimal=False), nullable=False)
   custodian_ref = Column(String(100), nullable=True) # CUST_A_12345, etc.
 
   # Metadata
@@ -100,6 +105,11 @@ class Position(Base):
   __table_args__ = (
     Index("idx_position_date_account", "report_date", "account_id"),
     Index("idx_position_date_ticker", "report_date", "ticker"),
+    # Covers reconciliation/concentration lookups keyed by (account_id, ticker)
+    Index(
+      "idx_position_aid_ticker_date",
+      "account_id", "ticker", "report_date", "shares", "market_value",
+    ),
   )
 
   def __repr__(self):
@@ -109,10 +119,51 @@ class Position(Base):
     )
 
 
+class IngestVersion(Base):
+  """Single-row counter advanced by every committed ingest, shared by all workers."""
+
+  __tablename__ = "ingest_version"
+
+  id = Column(Integer, primary_key=True)
+  version = Column(Integer, nullable=False)
+
+
+# Seed the counter's only row whenever the table is created
+event.listen(
+  IngestVersion.__table__,
+  "after_create",
+  DDL("INSERT INTO ingest_version (id, version) VALUES (1, 0)"),
+)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+  """Use WAL journaling so readers don't block on writers, and fsync less often."""
+  cursor = dbapi_connection.cursor()
+  cursor.execute("PRAGMA journal_mode=WAL")
+  cursor.execute("PRAGMA synchronous=NORMAL")
+  # 64 MiB page cache and in-memory temp tables for sorts and aggregates
+  cursor.execute("PRAGMA cache_size=-65536")
+  cursor.execute("PRAGMA temp_store=MEMORY")
+  cursor.close()
+
+
 # Database initialization
+def create_db_engine(db_url="sqlite:///portfolio.db"):
+  """Create an engine for an existing database without touching the schema."""
+  # Larger statement cache so every endpoint's queries stay compiled
+  engine_args = {"echo": False, "query_cache_size": 1200}
+  if not db_url.startswith("sqlite"):
+    # Server databases get a pooled set of reusable connections
+    engine_args.update(pool_size=10, max_overflow=20, pool_pre_ping=True)
+  engine = create_engine(db_url, **engine_args)
+  if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+  return engine
+
+
 def init_db(db_url="sqlite:///portfolio.db"):
   """Initialize database and create all tables."""
-  engine = create_engine(db_url, echo=False)
+  engine = create_db_engine(db_url)
   Base.metadata.create_all(engine)
   return engine
 
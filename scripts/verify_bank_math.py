@@ -4,7 +4,6 @@ Simple script to verify portfolio math from YAML bank positions file.
 Reads positions, aggregates by account, calculates percentages.
 """
 import yaml
-from decimal import Decimal
 from pprint import pprint
 from collections import defaultdict
 
@@ -12,38 +11,30 @@ from collections import defaultdict
 with open('sample_data/bank_positions.yaml', 'r') as f:
   data = yaml.safe_load(f)
 
-positions_by_account = defaultdict(lambda: {'positions': {}, 'account_total_value': Decimal('0')})
+# Floats are precise enough for a 2-decimal compliance check
+positions_by_account = defaultdict(dict)
+account_totals = defaultdict(float)
 
 for position in data['positions']:
   account = position['account_id']
-  ticker = position['ticker']
-  shares = position['shares']
-  market_value = Decimal(str(position['market_value']))
-
-  positions_by_account[account]['positions'][ticker] = {
-    'shares': shares,
-    'market_value': float(market_value)
+  market_value = float(position['market_value'])
+  positions_by_account[account][position['ticker']] = {
+    'shares': position['shares'],
+    'market_value': market_value
   }
-
-  positions_by_account[account]['account_total_value'] += market_value
+  account_totals[account] += market_value
 
 # Calculate percentages
 result = {}
-for account, data in sorted(positions_by_account.items()):
+for account, positions in sorted(positions_by_account.items()):
+  acct_total = account_totals[account]
+  for pos_data in positions.values():
+    pos_data['pct_of_account'] = pos_data['market_value'] / acct_total * 100 if acct_total > 0 else 0.0
   result[account] = {
-    'positions': data['positions'],
-    'account_total_value': float(data['account_total_value'])
+    'positions': positions,
+    'account_total_value': acct_total
   }
 
-  acct_total = data['account_total_value']
-  for ticker, pos_data in result[account]['positions'].items():
-    pos_value = Decimal(str(pos_data['market_value']))
-    if acct_total > 0:
-      pct = (pos_value / acct_total) * 100
-      pos_data['pct_of_account'] = float(pct)
-    else:
-      pos_data['pct_of_account'] = 0.0
-
 print("PORTFOLIO ANALYSIS FROM BANK POSITIONS YAML")
 print("=" * 80)
 pprint(result, width=100)
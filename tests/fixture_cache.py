@@ -0,0 +1,86 @@
+"""
+Test database helpers: in-memory engines and an on-disk cache of ingested sample data.
+"""
+import hashlib
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+
+from models import init_db, get_session
+from ingestion import ingest_file
+
+CACHE_DIR = Path(__file__).parent / ".cache"
+
+# Code that shapes the ingested database; editing any of it invalidates the cache
+SOURCE_FILES = [Path(__file__).parent.parent / name for name in ("models.py", "ingestion.py", "validators.py")]
+
+
+def fixture_key(fixtures):
+    """Hash the fixture files, their formats and the ingestion code."""
+    digest = hashlib.sha256()
+    for file_path, file_format in fixtures:
+        digest.update(f"{file_path}|{file_format}\n".encode())
+        digest.update(Path(file_path).read_bytes())
+    for source in SOURCE_FILES:
+        digest.update(source.read_bytes())
+    return digest.hexdigest()
+
+
+def get_cached_db(fixtures):
+    """Return the path of a database with the fixtures ingested, building it on a cache miss."""
+    cached = CACHE_DIR / f"{fixture_key(fixtures)}.db"
+    if cached.exists():
+        return cached
+
+    CACHE_DIR.mkdir(exist_ok=True)
+    fd, build_path = tempfile.mkstemp(suffix=".db", dir=CACHE_DIR)
+    os.close(fd)
+    try:
+        engine = init_db(f"sqlite:///{build_path}")
+        session = get_session(engine)
+        for file_path, file_format in fixtures:
+            ingest_file(session, file_path, file_format)
+        session.close()
+        # Closing the last connection checkpoints the WAL into the main file
+        engine.dispose()
+        os.replace(build_path, cached)
+    except BaseException:
+        os.unlink(build_path)
+        raise
+    return cached
+
+
+def _set_memory_pragmas(dbapi_connection, connection_record):
+    """Nothing to make durable in memory, so skip journaling and syncs."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=MEMORY")
+    cursor.execute("PRAGMA synchronous=OFF")
+    cursor.close()
+
+
+def make_test_engine():
+    """Create an in-memory SQLite engine whose sessions all share one connection."""
+    engine = create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    event.listen(engine, "connect", _set_memory_pragmas)
+    return engine
+
+
+def cached_memory_engine(fixtures):
+    """Load the cached database for the fixtures into a fresh in-memory engine."""
+    engine = make_test_engine()
+    source = sqlite3.connect(get_cached_db(fixtures))
+    connection = engine.raw_connection()
+    try:
+        source.backup(connection.driver_connection)
+    finally:
+        connection.close()
+        source.close()
+    return engine
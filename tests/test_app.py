@@ -4,34 +4,86 @@ Unit tests for portfolio reconciliation system.
 import unittest
 import os
 import tempfile
+import gc
+import weakref
+from unittest import mock
 from datetime import date
 from decimal import Decimal
 
-from models import init_db, get_session, Account, Trade, Position
+from pydantic import ValidationError
+from sqlalchemy import delete, event, update
+from sqlalchemy.orm import Session
+
+from models import get_session, Base, Account, IngestVersion, Trade, Position
+import ingestion
 from ingestion import (
     ingest_trade_format1,
     ingest_trade_format2,
     ingest_bank_positions,
     extract_custodian_name,
+    file_chunks,
+    parse_trade_chunk,
+)
+from validators import BankPositionFile, TradeFormat1, parse_iso_date, parse_compact_date
+from app import (
+    app,
+    build_concentration_report,
+    build_reconciliation_report,
+    cached_account_positions,
+    cached_report,
+    infer_file_format,
+    net_shares_stmt,
 )
-from app import app
+from fixture_cache import cached_memory_engine, make_test_engine
 
+ENDPOINT_FIXTURES = [
+    ("sample_data/trades_format1.csv", "CSV_FORMAT1"),
+    ("sample_data/trades_format2.txt", "PIPE_FORMAT2"),
+    ("sample_data/bank_positions.yaml", "YAML_POSITIONS"),
+]
 
-class TestModels(unittest.TestCase):
-    """Test database models."""
+
+class DatabaseTestCase(unittest.TestCase):
+    """Shares one in-memory database per class; each test runs in a rolled-back transaction."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Create the schema once in an in-memory database."""
+        cls.engine = make_test_engine()
+
+        # Let SQLAlchemy emit BEGIN itself so SAVEPOINTs nest inside it
+        @event.listens_for(cls.engine, "connect")
+        def disable_pysqlite_begin(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(cls.engine, "begin")
+        def emit_begin(connection):
+            connection.exec_driver_sql("BEGIN")
+
+        Base.metadata.create_all(cls.engine)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Release the in-memory database."""
+        cls.engine.dispose()
 
     def setUp(self):
-        """Set up test database."""
-        self.db_file = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
-        self.db_file.close()
-        self.db_url = f"sqlite:///{self.db_file.name}"
-        self.engine = init_db(self.db_url)
-        self.session = get_session(self.engine)
+        """Open a session whose commits only release savepoints."""
+        self.connection = self.engine.connect()
+        self.trans = self.connection.begin()
+        self.session = Session(
+            bind=self.connection, join_transaction_mode="create_savepoint"
+        )
 
     def tearDown(self):
-        """Clean up test database."""
+        """Roll back everything the test wrote."""
         self.session.close()
-        os.unlink(self.db_file.name)
+        self.trans.rollback()
+        self.connection.close()
+
+
+class TestModels(DatabaseTestCase):
+    """Test database models."""
 
     def test_account_creation(self):
         """Test account creation."""
@@ -82,22 +134,44 @@ class TestCustodianExtraction(unittest.TestCase):
         self.assertIsNone(extract_custodian_name(None))
 
 
-class TestIngestion(unittest.TestCase):
+class TestDateParsing(unittest.TestCase):
+    """Test fast date parsing helpers."""
+
+    def test_parse_dates(self):
+        """Test both date layouts parse and reject impossible dates."""
+        self.assertEqual(parse_iso_date("2025-01-15"), date(2025, 1, 15))
+        self.assertEqual(parse_iso_date("2025-1-5"), date(2025, 1, 5))
+        self.assertEqual(parse_compact_date("20250115"), date(2025, 1, 15))
+        with self.assertRaises(ValueError):
+            parse_iso_date("2025-02-30")
+        with self.assertRaises(ValueError):
+            parse_compact_date("2025-01-15")
+
+    def test_trade_date_fields(self):
+        """Test trade date fields take strings or dates but not timestamps."""
+        row = {
+            "TradeDate": "2025-1-15", "AccountID": "ACC001", "Ticker": "AAPL",
+            "Quantity": "10", "Price": "185.50", "TradeType": "BUY",
+            "SettlementDate": date(2025, 1, 17),
+        }
+        trade = TradeFormat1(**row)
+        self.assertEqual(trade.trade_date, date(2025, 1, 15))
+        self.assertEqual(trade.settlement_date, date(2025, 1, 17))
+        with self.assertRaises(ValidationError):
+            TradeFormat1(**{**row, "TradeDate": "1736899200"})
+
+    def test_bank_report_date(self):
+        """Test bank report dates parse from YYYYMMDD and reject bad digits."""
+        bank_file = BankPositionFile(report_date="20250115", positions=[])
+        self.assertEqual(bank_file.report_date, date(2025, 1, 15))
+        for bad in ("20251301", "2025-01-15"):
+            with self.assertRaises(ValidationError):
+                BankPositionFile(report_date=bad, positions=[])
+
+
+class TestIngestion(DatabaseTestCase):
     """Test data ingestion."""
 
-    def setUp(self):
-        """Set up test database."""
-        self.db_file = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
-        self.db_file.close()
-        self.db_url = f"sqlite:///{self.db_file.name}"
-        self.engine = init_db(self.db_url)
-        self.session = get_session(self.engine)
-
-    def tearDown(self):
-        """Clean up test database."""
-        self.session.close()
-        os.unlink(self.db_file.name)
-
     def test_ingest_format1(self):
         """Test ingestion of CSV trade format."""
         report = ingest_trade_format1(
@@ -155,39 +229,127 @@ class TestIngestion(unittest.TestCase):
         account = self.session.query(Account).filter_by(account_id="ACC001").first()
         self.assertEqual(account.custodian_name, "CUSTODIAN_A")
 
+    def test_ingest_chunked_matches_whole_file(self):
+        """Test chunked trade parsing keeps every row and row number."""
+        path = "sample_data/trades_format2.txt"
+        _, whole, _ = parse_trade_chunk(path, 0, os.path.getsize(path), "PIPE_FORMAT2")
+
+        original = ingestion.PARALLEL_CHUNK_BYTES
+        ingestion.PARALLEL_CHUNK_BYTES = 97
+        try:
+            chunked = [
+                trade
+                for start, end in file_chunks(path)
+                for trade in parse_trade_chunk(path, start, end, "PIPE_FORMAT2")[1]
+            ]
+            report = ingest_trade_format2(self.session, path)
+        finally:
+            ingestion.PARALLEL_CHUNK_BYTES = original
+
+        self.assertEqual(chunked, whole)
+        self.assertEqual(report.records_valid, 10)
+        self.assertEqual(self.session.query(Trade).count(), 10)
+
+    def test_ingest_process_pool_matches_single_pass(self):
+        """Test pooled chunk parsing keeps file order and row numbers."""
+        with open("sample_data/trades_format2.txt") as sample:
+            content = sample.read()
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write(content + "20250115|ACC001|AAPL|abc|100.00|CUSTODIAN_A\n")
+        try:
+            _, whole, _ = parse_trade_chunk(f.name, 0, os.path.getsize(f.name), "PIPE_FORMAT2")
+            with mock.patch.object(ingestion, "PARALLEL_CHUNK_BYTES", 97), \
+                    mock.patch("os.cpu_count", return_value=4), \
+                    mock.patch.object(ingestion, "ProcessPoolExecutor", wraps=ingestion.ProcessPoolExecutor) as pool:
+                pooled = [
+                    trade
+                    for _, trades, _ in ingestion.iter_trade_chunks(f.name, "PIPE_FORMAT2")
+                    for trade in trades
+                ]
+                report = ingest_trade_format2(self.session, f.name)
+        finally:
+            os.unlink(f.name)
+
+        self.assertEqual(pool.call_count, 2)
+        self.assertEqual(pooled, whole)
+        self.assertEqual(report.records_valid, 10)
+        self.assertEqual(report.records_failed, 1)
+        self.assertEqual(len(report.errors), 1)
+        self.assertTrue(report.errors[0].startswith("Row 12: "))
+
+    def test_money_rounded_to_column_scale(self):
+        """Test unrounded Format 2 values are stored at the columns' 2 places."""
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write(
+                "REPORT_DATE|ACCOUNT_ID|SECURITY_TICKER|SHARES|MARKET_VALUE|SOURCE_SYSTEM\n"
+                "20260115|ACC001|AAPL|-5|-100.123|CUSTODIAN_A\n"
+            )
+        try:
+            ingest_trade_format2(self.session, f.name)
+        finally:
+            os.unlink(f.name)
+
+        trade = self.session.query(Trade).one()
+        self.assertEqual(trade.market_value, -100.12)
+        self.assertEqual(trade.price, 20.02)
+
+    def test_bad_rows_in_validation_batch(self):
+        """Test one bad row in a validation batch only fails that row."""
+        with open("sample_data/trades_format1.csv") as f:
+            lines = f.read().splitlines()
+        lines[2] = lines[2].replace(",50,", ",-50,")
+        lines[5] += ",EXTRA"
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write("\n".join(lines) + "\n")
+
+        original = ingestion.VALIDATE_BATCH_SIZE
+        ingestion.VALIDATE_BATCH_SIZE = 4
+        try:
+            processed, trades, errors = parse_trade_chunk(
+                f.name, 0, os.path.getsize(f.name), "CSV_FORMAT1"
+            )
+        finally:
+            ingestion.VALIDATE_BATCH_SIZE = original
+            os.unlink(f.name)
 
-class TestEndpoints(unittest.TestCase):
-    """Test Flask API endpoints."""
+        self.assertEqual(processed, 10)
+        self.assertEqual(len(trades), 8)
+        self.assertEqual([index for index, _ in errors], [1, 4])
+        self.assertIn("Expected 7 fields, got 8", errors[1][1])
 
-    def setUp(self):
-        """Set up test client and database."""
-        self.db_file = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
-        self.db_file.close()
-        test_db_url = f"sqlite:///{self.db_file.name}"
+    def test_accounts_created_then_custodian_filled(self):
+        """Test new account counting and custodian backfill."""
+        report = ingest_trade_format1(
+            self.session, "sample_data/trades_format1.csv"
+        )
+        self.assertEqual(report.new_accounts_created, 4)
 
-        # Initialize test database
-        test_engine = init_db(test_db_url)
-        session = get_session(test_engine)
+        report = ingest_bank_positions(
+            self.session, "sample_data/bank_positions.yaml"
+        )
+        self.assertEqual(report.new_accounts_created, 0)
 
-        # Ingest test data
-        ingest_trade_format1(session, "sample_data/trades_format1.csv")
-        ingest_trade_format2(session, "sample_data/trades_format2.txt")
-        ingest_bank_positions(session, "sample_data/bank_positions.yaml")
+        account = self.session.query(Account).filter_by(account_id="ACC001").first()
+        self.assertEqual(account.custodian_name, "CUSTODIAN_A")
 
-        session.close()
 
-        # Now set up Flask app to use test database
-        import app as app_module
-        # Replace the engine in the app module
-        app_module.engine = test_engine
+class TestEndpoints(unittest.TestCase):
+    """Test Flask API endpoints."""
+
+    def setUp(self):
+        """Give each test its own in-memory copy of the cached sample database."""
+        self.test_engine = cached_memory_engine(ENDPOINT_FIXTURES)
 
-        self.app = app_module.app
+        # Point the app at the test database through its config
+        self.app = app
         self.app.config["TESTING"] = True
+        self.app.config["ENGINE"] = self.test_engine
         self.client = self.app.test_client()
 
     def tearDown(self):
         """Clean up test database."""
-        os.unlink(self.db_file.name)
+        self.app.config.pop("ENGINE", None)
+        self.test_engine.dispose()
         if "DATABASE_URL" in os.environ:
             del os.environ["DATABASE_URL"]
 
@@ -198,6 +360,17 @@ class TestEndpoints(unittest.TestCase):
         data = response.get_json()
         self.assertEqual(data["status"], "healthy")
 
+    def test_json_provider_options(self):
+        """Test the orjson provider honours sort_keys, default and other json.dumps options."""
+        obj = {"b": 1, "a": "é"}
+        self.assertEqual(self.app.json.dumps(obj), '{"a":"é","b":1}')
+        self.assertEqual(self.app.json.dumps(obj, sort_keys=False), '{"b":1,"a":"é"}')
+        self.assertEqual(self.app.json.dumps({"a": {1}}, default=sorted), '{"a":[1]}')
+        self.assertEqual(self.app.json.dumps(obj, ensure_ascii=True), '{"a": "\\u00e9", "b": 1}')
+        with self.app.test_request_context():
+            body = self.app.json.response(obj).get_data(as_text=True)
+        self.assertEqual(body, '{"a":"é","b":1}\n')
+
     def test_ingest_endpoint(self):
         """Test ingest endpoint with file upload."""
         with open("sample_data/trades_format1.csv", "rb") as f:
@@ -229,6 +402,75 @@ class TestEndpoints(unittest.TestCase):
             self.assertIn("cost_basis", position)
             self.assertIn("market_value", position)
 
+    def test_positions_batched_accounts(self):
+        """Test one positions request can cover several accounts."""
+        single = self.client.get("/positions?account=ACC001&date=2026-01-15").get_json()
+        response = self.client.get("/positions?accounts=ACC001,ACC002&date=2026-01-15")
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data["accounts"], ["ACC001", "ACC002"])
+
+        acc001 = [p for p in data["positions"] if p["account_id"] == "ACC001"]
+        self.assertEqual([p["ticker"] for p in acc001], [p["ticker"] for p in single["positions"]])
+        self.assertTrue(any(p["account_id"] == "ACC002" for p in data["positions"]))
+
+    def test_positions_refresh_after_ingest(self):
+        """Test cached positions are rebuilt once new trades are ingested."""
+        def acc001_aapl_cost():
+            data = self.client.get("/positions?account=ACC001&date=2026-01-15").get_json()
+            return next(p["total_cost"] for p in data["positions"] if p["ticker"] == "AAPL")
+
+        first = acc001_aapl_cost()
+        self.assertEqual(acc001_aapl_cost(), first)
+
+        session = get_session(self.test_engine)
+        ingest_trade_format1(session, "sample_data/trades_format1.csv")
+        session.close()
+
+        self.assertAlmostEqual(acc001_aapl_cost(), first + 18550.00, places=2)
+
+    def test_positions_follow_database_ingest_version(self):
+        """Test a version bump committed by another worker retires cached positions."""
+        def acc001_cost_basis():
+            data = self.client.get("/positions?account=ACC001&date=2026-01-15").get_json()
+            return [p["cost_basis"] for p in data["positions"]]
+
+        self.assertTrue(any(acc001_cost_basis()))
+        with self.test_engine.begin() as connection:
+            connection.execute(delete(Trade))
+            connection.execute(update(IngestVersion).values(version=IngestVersion.version + 1))
+
+        self.assertFalse(any(acc001_cost_basis()))
+
+    def test_cached_positions_return_copies(self):
+        """Test mutating a served positions payload leaves the cached one intact."""
+        query_date = date(2026, 1, 15)
+        payload, _ = cached_account_positions(self.test_engine, "ACC001", query_date, 0)
+        payload["positions"].clear()
+        payload, _ = cached_account_positions(self.test_engine, "ACC001", query_date, 0)
+        self.assertTrue(payload["positions"])
+
+    def test_infer_file_format(self):
+        """Test file format inference from upload filenames."""
+        self.assertEqual(infer_file_format("trades_format1.csv"), "CSV_FORMAT1")
+        self.assertEqual(infer_file_format("Trades_FORMAT2.CSV"), "PIPE_FORMAT2")
+        self.assertEqual(infer_file_format("trades.txt"), "PIPE_FORMAT2")
+        self.assertEqual(infer_file_format("positions.yml"), "YAML_POSITIONS")
+        self.assertIsNone(infer_file_format("trades.csv"))
+        self.assertIsNone(infer_file_format("positions"))
+
+    def test_invalid_date_rejected(self):
+        """Test endpoints reject dates not in YYYY-MM-DD form."""
+        for date_str in ["20260115", "2026-02-30", "2026-+1-15", "2026- 1-15", "2026-01-1_"]:
+            response = self.client.get("/reconciliation", query_string={"date": date_str})
+            self.assertEqual(response.status_code, 400, date_str)
+
+    def test_single_digit_date_accepted(self):
+        """Test dates with single-digit months and days parse as strptime allows."""
+        for date_str in ["2026-1-15", "2026-01-5"]:
+            response = self.client.get(f"/reconciliation?date={date_str}")
+            self.assertEqual(response.status_code, 200, date_str)
+
     def test_compliance_endpoint(self):
         """Test compliance concentration endpoint."""
         response = self.client.get("/compliance/concentration?date=2026-01-15")
@@ -272,22 +514,69 @@ class TestEndpoints(unittest.TestCase):
         self.assertEqual(googl_discrepancy["expected_shares"], 200)
         self.assertEqual(googl_discrepancy["actual_shares"], 75)
 
+    def test_reconciliation_refreshes_after_ingest(self):
+        """Test cached reports are rebuilt once new trades are ingested."""
+        def acc001_googl_expected():
+            data = self.client.get("/reconciliation?date=2026-01-15").get_json()
+            return next(
+                d["expected_shares"] for d in data["discrepancies"]
+                if d["account_id"] == "ACC001" and d["ticker"] == "GOOGL"
+            )
 
-class TestDataQuality(unittest.TestCase):
-    """Test data quality and validation."""
+        self.assertEqual(acc001_googl_expected(), 200)
 
-    def setUp(self):
-        """Set up test database."""
-        self.db_file = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
-        self.db_file.close()
-        self.db_url = f"sqlite:///{self.db_file.name}"
-        self.engine = init_db(self.db_url)
-        self.session = get_session(self.engine)
+        with open("sample_data/trades_format1.csv", "rb") as f:
+            self.client.post(
+                "/ingest",
+                data={"file": (f, "trades_format1.csv"), "file_format": "CSV_FORMAT1"},
+                content_type="multipart/form-data"
+            )
 
-    def tearDown(self):
-        """Clean up test database."""
-        self.session.close()
-        os.unlink(self.db_file.name)
+        self.assertEqual(acc001_googl_expected(), 300)
+
+        # Ingesting outside the app also retires the cached report
+        session = get_session(self.test_engine)
+        ingest_trade_format1(session, "sample_data/trades_format1.csv")
+        session.close()
+
+        self.assertEqual(acc001_googl_expected(), 400)
+
+    def test_reports_follow_database_ingest_version(self):
+        """Test a version bump committed by another worker retires cached reports."""
+        def expected_shares():
+            data = self.client.get("/reconciliation?date=2026-01-15").get_json()
+            return {(d["account_id"], d["ticker"]): d["expected_shares"] for d in data["discrepancies"]}
+
+        before = expected_shares()
+        with self.test_engine.begin() as connection:
+            connection.execute(delete(Trade))
+            connection.execute(update(IngestVersion).values(version=IngestVersion.version + 1))
+
+        self.assertTrue(any(before.values()))
+        self.assertFalse(any(expected_shares().values()))
+
+    def test_cached_report_returns_copies(self):
+        """Test mutating a served report leaves the cached one intact."""
+        query_date = date(2026, 1, 15)
+        first = cached_report(build_reconciliation_report, self.test_engine, query_date, 0)
+        first["discrepancies"].clear()
+        second = cached_report(build_reconciliation_report, self.test_engine, query_date, 0)
+        self.assertTrue(second["discrepancies"])
+
+    def test_report_cache_releases_engines(self):
+        """Test cached reports don't keep a discarded engine alive."""
+        engine = cached_memory_engine(ENDPOINT_FIXTURES)
+        cached_report(build_reconciliation_report, engine, date(2026, 1, 15), 0)
+        cached_account_positions(engine, "ACC001", date(2026, 1, 15), 0)
+        engine_ref = weakref.ref(engine)
+        engine.dispose()
+        del engine
+        gc.collect()
+        self.assertIsNone(engine_ref())
+
+
+class TestDataQuality(DatabaseTestCase):
+    """Test data quality and validation."""
 
     def test_format_unification(self):
         """Test that both trade formats are unified correctly."""
@@ -318,13 +607,14 @@ class TestDataQuality(unittest.TestCase):
         ingest_trade_format2(self.session, "sample_data/trades_format2.txt")
         ingest_bank_positions(self.session, "sample_data/bank_positions.yaml")
 
-        # Calculate expected positions from trades
-        trades = (
-            self.session.query(Trade)
-            .filter(Trade.account_id == "ACC001", Trade.ticker == "GOOGL")
-            .all()
-        )
-        expected_googl = sum(t.quantity for t in trades)
+        # Calculate expected positions from trades in one aggregate query
+        expected = {
+            (row.account_id, row.ticker): row.shares
+            for row in self.session.execute(
+                net_shares_stmt(), {"as_of": date(2026, 1, 15)}
+            )
+        }
+        expected_googl = expected[("ACC001", "GOOGL")]
         # Both Format1 (100) and Format2 (100) = 200 total
         self.assertEqual(expected_googl, 200)
 
@@ -339,6 +629,35 @@ class TestDataQuality(unittest.TestCase):
         # Verify discrepancy
         self.assertNotEqual(expected_googl, position.shares)
 
+    def test_concentration_percentages_exact(self):
+        """Test concentration percentages are free of float division noise."""
+        report_date = date(2026, 1, 15)
+        self.session.add(Account(account_id="EDGE001"))
+        for ticker, market_value in (("AAA", 0.21), ("BBB", 0.14)):
+            self.session.add(Position(
+                report_date=report_date, account_id="EDGE001", ticker=ticker,
+                shares=1, market_value=market_value,
+            ))
+        self.session.commit()
+
+        violations = build_concentration_report(self.session, report_date)["from_bank"]["violations"]
+        pcts = {v["ticker"]: (v["concentration_pct"], v["excess_pct"]) for v in violations}
+        self.assertEqual(pcts, {"AAA": (60.0, 40.0), "BBB": (40.0, 20.0)})
+
+    def test_concentration_exactly_at_threshold(self):
+        """Test a holding worth exactly 20% of its account is not a violation."""
+        report_date = date(2026, 1, 15)
+        self.session.add(Account(account_id="EDGE001"))
+        for ticker, market_value in (("AAA", 0.07), ("BBB", 0.28)):
+            self.session.add(Position(
+                report_date=report_date, account_id="EDGE001", ticker=ticker,
+                shares=1, market_value=market_value,
+            ))
+        self.session.commit()
+
+        violations = build_concentration_report(self.session, report_date)["from_bank"]["violations"]
+        self.assertEqual([v["ticker"] for v in violations], ["BBB"])
+
 
 if __name__ == "__main__":
     unittest.main()
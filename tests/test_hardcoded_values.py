@@ -3,59 +3,56 @@ Comprehensive hardcoded tests for both truths (trades vs bank).
 Values are based on verified math from the sample data files.
 """
 import unittest
-import os
-import tempfile
 from decimal import Decimal
 
-from models import init_db, get_session
-from ingestion import ingest_trade_format1, ingest_bank_positions
 from app import app
+from fixture_cache import cached_memory_engine
 
+FORMAT1_FIXTURES = [
+    ("sample_data/trades_format1.csv", "CSV_FORMAT1"),
+    ("sample_data/bank_positions.yaml", "YAML_POSITIONS"),
+]
 
-class TestBothTruths(unittest.TestCase):
-    """Test hardcoded expected values for both trade and bank truths."""
-
-    def setUp(self):
-        """Set up test database with sample data."""
-        self.db_file = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
-        self.db_file.close()
-        test_db_url = f"sqlite:///{self.db_file.name}"
 
-        # Initialize test database
-        test_engine = init_db(test_db_url)
-        session = get_session(test_engine)
+def _group_violations(data):
+    """Index a concentration response as {(source, account_id): {ticker: violation}}."""
+    grouped = {}
+    for source in ("from_trades", "from_bank"):
+        for v in data.get(source, {}).get("violations", []):
+            grouped.setdefault((source, v["account_id"]), {})[v["ticker"]] = v
+    return grouped
 
-        # Ingest both trade and bank files
-        ingest_trade_format1(session, "sample_data/trades_format1.csv")
-        ingest_bank_positions(session, "sample_data/bank_positions.yaml")
 
-        session.close()
-
-        # Set up Flask app
-        import app as app_module
-        app_module.engine = test_engine
-        self.app = app_module.app
-        self.app.config["TESTING"] = True
-        self.client = self.app.test_client()
+class TestBothTruths(unittest.TestCase):
+    """Test hardcoded expected values for both trade and bank truths."""
 
-    def tearDown(self):
-        """Clean up test database."""
-        os.unlink(self.db_file.name)
+    @classmethod
+    def setUpClass(cls):
+        """Set up test database with sample data once per class."""
+        # Ingestion is cached on disk; each class loads it into memory
+        cls.test_engine = cached_memory_engine(FORMAT1_FIXTURES)
+        cls.app = app
+        cls.app.config["TESTING"] = True
+        cls.app.config["ENGINE"] = cls.test_engine
+
+        # Every test reads the same deterministic report, so fetch it once
+        response = cls.app.test_client().get("/compliance/concentration?date=2026-01-15")
+        cls._concentration_status = response.status_code
+        cls._concentration_json = response.get_json()
+        cls._grouped = _group_violations(cls._concentration_json)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Release the in-memory test database."""
+        cls.app.config.pop("ENGINE", None)
+        cls.test_engine.dispose()
 
     def test_acc001_from_trades(self):
         """Test ACC001 calculated from trades - HARDCODED VALUES."""
-        response = self.client.get("/compliance/concentration?date=2026-01-15")
-        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._concentration_status, 200)
 
-        data = response.get_json()
-        from_trades = data.get("from_trades", {})
-        violations = from_trades.get("violations", [])
-
-        # Get ACC001 violations
-        acc001 = [v for v in violations if v["account_id"] == "ACC001"]
-        self.assertEqual(len(acc001), 3, "ACC001 should have 3 violations")
-
-        violations_by_ticker = {v["ticker"]: v for v in acc001}
+        violations_by_ticker = self._grouped.get(("from_trades", "ACC001"), {})
+        self.assertEqual(len(violations_by_ticker), 3, "ACC001 should have 3 violations")
 
         # AAPL: 100 shares @ $185.50 = $18,550.00
         # Account total: $53,842.50
@@ -84,18 +81,10 @@ class TestBothTruths(unittest.TestCase):
 
     def test_acc001_from_bank(self):
         """Test ACC001 from bank positions - HARDCODED VALUES."""
-        response = self.client.get("/compliance/concentration?date=2026-01-15")
-        self.assertEqual(response.status_code, 200)
-
-        data = response.get_json()
-        from_bank = data.get("from_bank", {})
-        violations = from_bank.get("violations", [])
+        self.assertEqual(self._concentration_status, 200)
 
-        # Get ACC001 violations
-        acc001 = [v for v in violations if v["account_id"] == "ACC001"]
-        self.assertEqual(len(acc001), 3, "ACC001 should have 3 violations from bank")
-
-        violations_by_ticker = {v["ticker"]: v for v in acc001}
+        violations_by_ticker = self._grouped.get(("from_bank", "ACC001"), {})
+        self.assertEqual(len(violations_by_ticker), 3, "ACC001 should have 3 violations from bank")
 
         # AAPL: 100 shares, market value $18,550.00
         # Account total from bank: $50,272.50 (GOOGL is 75 shares, not 100)
@@ -124,15 +113,8 @@ class TestBothTruths(unittest.TestCase):
 
     def test_acc002_from_trades(self):
         """Test ACC002 calculated from trades - HARDCODED VALUES."""
-        response = self.client.get("/compliance/concentration?date=2026-01-15")
-        data = response.get_json()
-        from_trades = data.get("from_trades", {})
-        violations = from_trades.get("violations", [])
-
-        acc002 = [v for v in violations if v["account_id"] == "ACC002"]
-        self.assertEqual(len(acc002), 2, "ACC002 should have 2 violations")
-
-        violations_by_ticker = {v["ticker"]: v for v in acc002}
+        violations_by_ticker = self._grouped.get(("from_trades", "ACC002"), {})
+        self.assertEqual(len(violations_by_ticker), 2, "ACC002 should have 2 violations")
 
         # AAPL: 200 shares @ $185.50 = $37,100.00
         # Account total: $108,446.00
@@ -156,12 +138,7 @@ class TestBothTruths(unittest.TestCase):
 
     def test_acc003_short_position_handling(self):
         """Test ACC003 with SELL (short position) - HARDCODED VALUES."""
-        response = self.client.get("/compliance/concentration?date=2026-01-15")
-        data = response.get_json()
-        from_trades = data.get("from_trades", {})
-        violations = from_trades.get("violations", [])
-
-        acc003 = [v for v in violations if v["account_id"] == "ACC003"]
+        violations_by_ticker = self._grouped.get(("from_trades", "ACC003"), {})
 
         # ACC003 has:
         # NVDA: 80 shares @ $505.30 = $40,424.00 (positive)
@@ -169,8 +146,6 @@ class TestBothTruths(unittest.TestCase):
         # Account total for concentration: $40,424.00 (only positive positions)
         # NVDA concentration: 100% (only positive position)
 
-        violations_by_ticker = {v["ticker"]: v for v in acc003}
-
         # NVDA should be the only violation (100% concentration)
         self.assertIn("NVDA", violations_by_ticker)
         self.assertEqual(violations_by_ticker["NVDA"]["shares"], 80)
@@ -179,7 +154,7 @@ class TestBothTruths(unittest.TestCase):
         self.assertAlmostEqual(violations_by_ticker["NVDA"]["concentration_pct"], 100.00, delta=0.05)
 
         # Concentration should NEVER exceed 100%
-        for v in acc003:
+        for v in violations_by_ticker.values():
             self.assertLessEqual(v["concentration_pct"], 100.0,
                                f"{v['ticker']} concentration {v['concentration_pct']}% exceeds 100%!")
 
@@ -188,16 +163,9 @@ class TestBothTruths(unittest.TestCase):
 
     def test_acc004_only_in_trades(self):
         """Test ACC004 exists in trades but NOT in bank - HARDCODED VALUES."""
-        response = self.client.get("/compliance/concentration?date=2026-01-15")
-        data = response.get_json()
-        from_trades = data.get("from_trades", {})
-        from_bank = data.get("from_bank", {})
-
         # ACC004 should have violations from trades
-        acc004_trades = [v for v in from_trades.get("violations", []) if v["account_id"] == "ACC004"]
-        self.assertEqual(len(acc004_trades), 2, "ACC004 should have 2 violations from trades")
-
-        violations_by_ticker = {v["ticker"]: v for v in acc004_trades}
+        violations_by_ticker = self._grouped.get(("from_trades", "ACC004"), {})
+        self.assertEqual(len(violations_by_ticker), 2, "ACC004 should have 2 violations from trades")
 
         # AAPL: 500 shares @ $185.50 = $92,750.00
         # Account total: $218,825.00
@@ -217,13 +185,11 @@ class TestBothTruths(unittest.TestCase):
         self.assertAlmostEqual(violations_by_ticker["MSFT"]["concentration_pct"], 57.61, delta=0.05)
 
         # ACC004 should NOT appear in bank violations
-        acc004_bank = [v for v in from_bank.get("violations", []) if v["account_id"] == "ACC004"]
-        self.assertEqual(len(acc004_bank), 0, "ACC004 should not exist in bank data")
+        self.assertNotIn(("from_bank", "ACC004"), self._grouped, "ACC004 should not exist in bank data")
 
     def test_no_concentration_over_100_percent(self):
         """Verify NO concentration ever exceeds 100% (professional constraint)."""
-        response = self.client.get("/compliance/concentration?date=2026-01-15")
-        data = response.get_json()
+        data = self._concentration_json
 
         # Check all violations from both sources
         from_trades = data.get("from_trades", {})
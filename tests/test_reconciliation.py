@@ -3,45 +3,56 @@ Comprehensive reconciliation and compliance tests with hardcoded expected values
 Tests each trade format separately against bank positions.
 """
 import unittest
-import os
-import tempfile
 from decimal import Decimal
 from datetime import date
 
-from models import init_db, get_session, Account, Trade, Position
-from ingestion import ingest_trade_format1, ingest_trade_format2, ingest_bank_positions
-from app import app
+from models import get_session, Account, Trade, Position
+from app import app, build_concentration_report, build_reconciliation_report
+from fixture_cache import cached_memory_engine
 
+FORMAT1_FIXTURES = [
+    ("sample_data/trades_format1.csv", "CSV_FORMAT1"),
+    ("sample_data/bank_positions.yaml", "YAML_POSITIONS"),
+]
 
-class TestFormat1Reconciliation(unittest.TestCase):
-    """Test reconciliation using Format 1 (CSV) only."""
+FORMAT2_FIXTURES = [
+    ("sample_data/trades_format2.txt", "PIPE_FORMAT2"),
+    ("sample_data/bank_positions.yaml", "YAML_POSITIONS"),
+]
 
-    def setUp(self):
-        """Set up test database with Format 1 + Bank Positions."""
-        self.db_file = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
-        self.db_file.close()
-        test_db_url = f"sqlite:///{self.db_file.name}"
+REPORT_DATE = date(2026, 1, 15)
 
-        # Initialize test database
-        test_engine = init_db(test_db_url)
-        session = get_session(test_engine)
-
-        # Ingest Format 1 and Bank Positions
-        ingest_trade_format1(session, "sample_data/trades_format1.csv")
-        ingest_bank_positions(session, "sample_data/bank_positions.yaml")
 
+def build_report(engine, builder):
+    """Run a report builder directly, skipping the HTTP and JSON layers."""
+    session = get_session(engine)
+    try:
+        return builder(session, REPORT_DATE)
+    finally:
         session.close()
 
-        # Set up Flask app
-        import app as app_module
-        app_module.engine = test_engine
-        self.app = app_module.app
-        self.app.config["TESTING"] = True
-        self.client = self.app.test_client()
 
-    def tearDown(self):
-        """Clean up test database."""
-        os.unlink(self.db_file.name)
+class TestFormat1Reconciliation(unittest.TestCase):
+    """Test reconciliation using Format 1 (CSV) only."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up test database with Format 1 + Bank Positions once per class."""
+        # Ingestion is cached on disk; each class loads it into memory
+        cls.test_engine = cached_memory_engine(FORMAT1_FIXTURES)
+        cls.app = app
+        cls.app.config["TESTING"] = True
+        cls.app.config["ENGINE"] = cls.test_engine
+
+    @classmethod
+    def tearDownClass(cls):
+        """Release the in-memory test database."""
+        cls.app.config.pop("ENGINE", None)
+        cls.test_engine.dispose()
+
+    def setUp(self):
+        """Open a fresh test client on the class's app."""
+        self.client = self.app.test_client()
 
     def test_acc001_positions(self):
         """Test ACC001 positions match expected values."""
@@ -70,10 +81,7 @@ class TestFormat1Reconciliation(unittest.TestCase):
 
     def test_acc001_compliance_violations(self):
         """Test ACC001 has 3 compliance violations (all > 20%)."""
-        response = self.client.get("/compliance/concentration?date=2026-01-15")
-        self.assertEqual(response.status_code, 200)
-
-        data = response.get_json()
+        data = build_report(self.test_engine, build_concentration_report)
 
         # Get ACC001 violations from trades
         from_trades = data.get("from_trades", {})
@@ -99,10 +107,7 @@ class TestFormat1Reconciliation(unittest.TestCase):
 
     def test_acc002_compliance_violations(self):
         """Test ACC002 has 2 compliance violations (AAPL 34.2%, NVDA 55.9%)."""
-        response = self.client.get("/compliance/concentration?date=2026-01-15")
-        self.assertEqual(response.status_code, 200)
-
-        data = response.get_json()
+        data = build_report(self.test_engine, build_concentration_report)
 
         # Get ACC002 violations from trades
         from_trades = data.get("from_trades", {})
@@ -158,10 +163,7 @@ class TestFormat1Reconciliation(unittest.TestCase):
 
     def test_acc002_reconciliation(self):
         """Test ACC002 has GOOGL missing in bank and TSLA missing in trades."""
-        response = self.client.get("/reconciliation?date=2026-01-15")
-        self.assertEqual(response.status_code, 200)
-
-        data = response.get_json()
+        data = build_report(self.test_engine, build_reconciliation_report)
 
         acc002_discrepancies = [
             d for d in data["discrepancies"]
@@ -186,39 +188,20 @@ class TestFormat1Reconciliation(unittest.TestCase):
 class TestFormat2Reconciliation(unittest.TestCase):
     """Test reconciliation using Format 2 (Pipe) only."""
 
-    def setUp(self):
-        """Set up test database with Format 2 + Bank Positions."""
-        self.db_file = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
-        self.db_file.close()
-        test_db_url = f"sqlite:///{self.db_file.name}"
-
-        # Initialize test database
-        test_engine = init_db(test_db_url)
-        session = get_session(test_engine)
-
-        # Ingest Format 2 and Bank Positions
-        ingest_trade_format2(session, "sample_data/trades_format2.txt")
-        ingest_bank_positions(session, "sample_data/bank_positions.yaml")
+    @classmethod
+    def setUpClass(cls):
+        """Set up test database with Format 2 + Bank Positions once per class."""
+        # Ingestion is cached on disk; each class loads it into memory
+        cls.test_engine = cached_memory_engine(FORMAT2_FIXTURES)
 
-        session.close()
-
-        # Set up Flask app
-        import app as app_module
-        app_module.engine = test_engine
-        self.app = app_module.app
-        self.app.config["TESTING"] = True
-        self.client = self.app.test_client()
-
-    def tearDown(self):
-        """Clean up test database."""
-        os.unlink(self.db_file.name)
+    @classmethod
+    def tearDownClass(cls):
+        """Release the in-memory test database."""
+        cls.test_engine.dispose()
 
     def test_format2_same_violations_as_format1(self):
         """Test Format 2 produces same compliance violations as Format 1."""
-        response = self.client.get("/compliance/concentration?date=2026-01-15")
-        self.assertEqual(response.status_code, 200)
-
-        data = response.get_json()
+        data = build_report(self.test_engine, build_concentration_report)
 
         # Should have same total violations as Format 1 (from trades)
         from_trades = data.get("from_trades", {})
@@ -230,10 +213,7 @@ class TestFormat2Reconciliation(unittest.TestCase):
 
     def test_format2_same_reconciliation_as_format1(self):
         """Test Format 2 produces same reconciliation discrepancies as Format 1."""
-        response = self.client.get("/reconciliation?date=2026-01-15")
-        self.assertEqual(response.status_code, 200)
-
-        data = response.get_json()
+        data = build_report(self.test_engine, build_reconciliation_report)
 
         # ACC001 GOOGL should still be a discrepancy
         acc001_googl = next(
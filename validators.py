@@ -2,12 +2,48 @@
 Pydantic validators for data quality checks during ingestion.
 """
 from datetime import date, datetime
-from decimal import Decimal
-from typing import Optional, List
-from pydantic import BaseModel, Field, validator, field_validator, ConfigDict
+from typing import Annotated, Literal, Optional, List
+from pydantic import BaseModel, Field, PlainValidator, TypeAdapter, validator, field_validator, ConfigDict
 from enum import Enum
 
 
+def parse_iso_date(v: str) -> date:
+  """Parse YYYY-MM-DD, using the C ISO parser before falling back to strptime."""
+  if len(v) == 10 and v[4] == "-" and v[7] == "-":
+    try:
+      return date.fromisoformat(v)
+    except ValueError:
+      pass
+  return datetime.strptime(v, "%Y-%m-%d").date()
+
+
+def parse_compact_date(v: str) -> date:
+  """Parse YYYYMMDD, slicing digits before falling back to strptime."""
+  if len(v) == 8 and v.isdigit():
+    try:
+      return date(int(v[:4]), int(v[4:6]), int(v[6:]))
+    except ValueError:
+      pass
+  return datetime.strptime(v, "%Y%m%d").date()
+
+
+def _date_from(parse):
+  """Build a single-argument field validator: parse strings, pass dates through."""
+  def validate(v):
+    if isinstance(v, str):
+      return parse(v)
+    if type(v) is date:
+      return v
+    raise ValueError(f"Invalid date: {v!r}")
+  return validate
+
+
+# Date fields validated by one plain function call, replacing a before-validator
+# with info plus pydantic's own date check on every row
+IsoDate = Annotated[date, PlainValidator(_date_from(parse_iso_date))]
+CompactDate = Annotated[date, PlainValidator(_date_from(parse_compact_date))]
+
+
 class TradeType(str, Enum):
   """Valid trade types."""
 
@@ -18,23 +54,16 @@ class TradeType(str, Enum):
 class TradeFormat1(BaseModel):
   """Validator for CSV trade format (Format 1)."""
 
-  trade_date: date = Field(alias="TradeDate")
+  trade_date: IsoDate = Field(alias="TradeDate")
   account_id: str = Field(alias="AccountID", min_length=1, max_length=50)
   ticker: str = Field(alias="Ticker", min_length=1, max_length=20)
   quantity: int = Field(alias="Quantity", gt=0)
-  price: Decimal = Field(alias="Price", gt=0)
-  trade_type: TradeType = Field(alias="TradeType")
-  settlement_date: date = Field(alias="SettlementDate")
+  price: float = Field(alias="Price", gt=0, allow_inf_nan=False)
+  # Literal checks the raw string without wrapping each row's value in TradeType
+  trade_type: Literal["BUY", "SELL"] = Field(alias="TradeType")
+  settlement_date: IsoDate = Field(alias="SettlementDate")
 
-  model_config = ConfigDict(populate_by_name=True)
-
-  @field_validator("trade_date", "settlement_date", mode="before")
-  @classmethod
-  def parse_date(cls, v):
-    """Parse date from string if needed."""
-    if isinstance(v, str):
-      return datetime.strptime(v, "%Y-%m-%d").date()
-    return v
+  model_config = ConfigDict(populate_by_name=True, frozen=True)
 
   @field_validator("settlement_date")
   @classmethod
@@ -49,57 +78,38 @@ class TradeFormat1(BaseModel):
 class TradeFormat2(BaseModel):
   """Validator for pipe-delimited trade format (Format 2)."""
 
-  report_date: date = Field(alias="REPORT_DATE")
+  report_date: CompactDate = Field(alias="REPORT_DATE")
   account_id: str = Field(alias="ACCOUNT_ID", min_length=1, max_length=50)
   ticker: str = Field(alias="SECURITY_TICKER", min_length=1, max_length=20)
   shares: int = Field(alias="SHARES") # Can be negative for SELL
-  market_value: Decimal = Field(alias="MARKET_VALUE")
+  market_value: float = Field(alias="MARKET_VALUE", allow_inf_nan=False)
   source_system: str = Field(alias="SOURCE_SYSTEM", min_length=1)
 
-  model_config = ConfigDict(populate_by_name=True)
-
-  @field_validator("report_date", mode="before")
-  @classmethod
-  def parse_date(cls, v):
-    """Parse date from YYYYMMDD format."""
-    if isinstance(v, str):
-      return datetime.strptime(v, "%Y%m%d").date()
-    return v
-
-  @field_validator("market_value")
-  @classmethod
-  def check_market_value_sign(cls, v, info):
-    """Ensure market value sign matches shares sign."""
-    shares = info.data.get("shares")
-    if shares is not None:
-      if (shares > 0 and v < 0) or (shares < 0 and v > 0):
-        # Allow this - market value and shares should have same sign
-        pass
-    return v
+  model_config = ConfigDict(populate_by_name=True, frozen=True)
 
   @property
-  def derived_price(self) -> Optional[Decimal]:
+  def derived_price(self) -> Optional[float]:
     """Calculate price per share from market value."""
     if self.shares != 0:
       return abs(self.market_value / self.shares)
     return None
 
 
+# Validate a whole list of rows in one pydantic-core call
+TRADE_FMT1_ADAPTER = TypeAdapter(List[TradeFormat1])
+TRADE_FMT2_ADAPTER = TypeAdapter(List[TradeFormat2])
+
+
 class BankPosition(BaseModel):
   """Validator for bank position data."""
 
   account_id: str = Field(min_length=1, max_length=50)
   ticker: str = Field(min_length=1, max_length=20)
   shares: int
-  market_value: Decimal
+  market_value: float = Field(allow_inf_nan=False)
   custodian_ref: str = Field(min_length=1)
 
-  @field_validator("market_value")
-  @classmethod
-  def check_value_positive(cls, v):
-    """Market value should generally be positive."""
-    # Note: Can be negative for short positions, but flag for review
-    return v
+  model_config = ConfigDict(frozen=True)
 
 
 class BankPositionFile(BaseModel):
@@ -108,12 +118,18 @@ class BankPositionFile(BaseModel):
   report_date: str
   positions: List[BankPosition]
 
+  model_config = ConfigDict(frozen=True)
+
   @field_validator("report_date")
   @classmethod
   def parse_report_date(cls, v):
     """Parse report date from YYYYMMDD format."""
     if len(v) == 8 and v.isdigit():
-      return datetime.strptime(v, "%Y%m%d").date()
+      # Already shape-checked, so build the date straight from the digits
+      try:
+        return date(int(v[0:4]), int(v[4:6]), int(v[6:8]))
+      except ValueError:
+        pass
     raise ValueError(f"Invalid report_date format: {v}")
 
 